@@ -1,16 +1,53 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 import uvicorn
 import asyncio
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
-from routers import api_router
-from services import periodic_analysis, perform_analysis
+from routers import api_router, warm_ai_config
+from services import perform_scheduled_analysis, start_attestation_worker, stop_pin_batcher, stop_question_batcher
+from services.ingestors.http import close_client
+
+# Periodic analysis cadence (reduced frequency to save API quota)
+ANALYSIS_INTERVAL_MINUTES = 60
+ANALYSIS_JITTER_SECONDS = 60  # Spread replicas' runs; the Redis lock keeps one per period
+
+# Response cache backend (falls back to in-process memory when unset)
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_MAX_CONNECTIONS = 50
+
+# Level for truthlens.* loggers (DEBUG shows per-request cache hits/misses)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("truthlens.app")
+
+def start_log_listener() -> QueueListener:
+    """Route truthlens.* records through a queue so request paths never block on stdout"""
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger("truthlens")
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+    root.propagate = False
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="TruthLens Oracle API",
         description="AI-powered credibility and manipulation risk analysis for crypto prediction markets",
         version="1.0.0",
+        default_response_class=ORJSONResponse,
     )
 
     # Enable CORS for web frontend (configure properly for production)
@@ -22,21 +59,71 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compress larger JSON payloads (history, analytics, metrics)
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+
     # Mount routers
     app.include_router(api_router)
 
     @app.on_event("startup")
     async def startup_event():
         """Run initial analysis on startup and schedule periodic analysis."""
-        print("🚀 TruthLens FastAPI Oracle starting...")
-        # Kick off initial analysis without blocking
-        asyncio.create_task(perform_analysis())
-        # Schedule periodic analysis (every 30 minutes)
-        asyncio.create_task(periodic_analysis())
+        app.state.log_listener = start_log_listener()
+        logger.info("🚀 TruthLens FastAPI Oracle starting...")
+        # Response cache for low-volatility GET endpoints
+        if REDIS_URL:
+            # One async pool shared by the response cache and handlers
+            pool = aioredis.ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+            app.state.redis = aioredis.Redis(connection_pool=pool)
+            FastAPICache.init(RedisBackend(app.state.redis), prefix="truthlens")
+        else:
+            FastAPICache.init(InMemoryBackend(), prefix="truthlens")
+        # Import the enhanced AI services and parse ai_config.ini off the event loop
+        await asyncio.to_thread(warm_ai_config)
+        # Background consumer for custom-question attestations
+        app.state.attestation_worker = start_attestation_worker()
+        # Kick off initial analysis without blocking; it takes the same Redis lock as scheduled runs
+        asyncio.create_task(perform_scheduled_analysis(getattr(app.state, "redis", None)))
+        # Schedule periodic analysis; max_instances/coalesce prevent overlapping runs in this
+        # process, and the Redis lock (when configured) coalesces runs across workers/replicas
+        scheduler = AsyncIOScheduler(event_loop=asyncio.get_running_loop())
+        scheduler.add_job(
+            perform_scheduled_analysis,
+            'interval',
+            minutes=ANALYSIS_INTERVAL_MINUTES,
+            jitter=ANALYSIS_JITTER_SECONDS,
+            kwargs={"redis": getattr(app.state, "redis", None)},
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=300,
+        )
+        scheduler.start()
+        app.state.scheduler = scheduler
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Stop the scheduler and release shared connections."""
+        scheduler = getattr(app.state, "scheduler", None)
+        if scheduler:
+            scheduler.shutdown(wait=False)
+        attestation_worker = getattr(app.state, "attestation_worker", None)
+        if attestation_worker:
+            attestation_worker.cancel()
+        # Batchers and their in-flight batches use the HTTP client, so stop them before closing it
+        await stop_question_batcher()
+        await stop_pin_batcher()
+        redis = getattr(app.state, "redis", None)
+        if redis:
+            await redis.close()
+            await redis.connection_pool.disconnect()
+        await close_client()
+        log_listener = getattr(app.state, "log_listener", None)
+        if log_listener:
+            log_listener.stop()
 
     return app
 
 app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True, loop="uvloop", http="httptools")
@@ -1,7 +1,20 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache
+from starlette.concurrency import run_in_threadpool
+from redis.asyncio import Redis
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Optional
+import configparser
+import logging
+import os
 import time
 
+import orjson
+
+import numpy as np
+
 from services import (
     MarketData,
     OracleReading,
@@ -10,6 +23,7 @@ from services import (
     CustomQueryResponse,
     OracleStatus,
     UserSettings,
+    UserSettingsUpdate,
     AnalyticsData,
     HistoryData,
     BlockchainData,
@@ -27,45 +41,71 @@ from services import (
     get_blockchain_service,
     get_metrics_service,
     perform_analysis,
+    get_cache_stats as _services_cache_stats,
+    clear_all_caches as _services_clear_all_caches,
 )
+from services.main import has_cached_markets
+
+logger = logging.getLogger("truthlens.routers")
 
-# Import enhanced AI services
-try:
-    from services.ai.performance_monitor import performance_monitor
-    from services.ai.batch_processor import queue_analysis, process_urgent, flush_queue, get_processing_status
-    from services.ai.cache_manager import ai_cache
-    ENHANCED_AI_AVAILABLE = True
-except ImportError:
-    ENHANCED_AI_AVAILABLE = False
-    print("Enhanced AI services not available")
+@lru_cache(maxsize=1)
+def _ai_mods() -> Optional[SimpleNamespace]:
+    """Import enhanced AI services on first use; None when unavailable"""
+    try:
+        from services.ai.performance_monitor import performance_monitor
+        from services.ai.batch_processor import flush_queue, get_processing_status
+        from services.ai.cache_manager import ai_cache
+    except ImportError as e:
+        logger.warning("⚠️ Enhanced AI services not available: %s", e)
+        return None
+    return SimpleNamespace(
+        performance_monitor=performance_monitor,
+        flush_queue=flush_queue,
+        get_processing_status=get_processing_status,
+        ai_cache=ai_cache,
+    )
 
 api_router = APIRouter()
 
+async def get_redis(request: Request) -> Optional[Redis]:
+    """Shared Redis client from app startup; None when REDIS_URL is unset"""
+    return getattr(request.app.state, "redis", None)
+
+def market_key_builder(func, namespace: str = "", request=None, response=None, args=(), kwargs=None):
+    """Cache key keyed on market_id only (ignores query string noise)"""
+    market_id = (kwargs or {}).get("market_id", "")
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}:{func.__name__}:{market_id}"
+
+# Static payloads serialized once at import
+_ROOT_BYTES = orjson.dumps({
+    "name": "TruthLens Oracle API",
+    "version": "1.0.0",
+    "description": "AI-powered credibility and manipulation risk analysis",
+    "endpoints": [
+        "/markets", "/oracle/{marketId}", "/analyze", "/status"
+    ]
+})
+
 @api_router.get("/")
 async def root():
     """API Root endpoint"""
-    return {
-        "name": "TruthLens Oracle API",
-        "version": "1.0.0",
-        "description": "AI-powered credibility and manipulation risk analysis",
-        "endpoints": [
-            "/markets", "/oracle/{marketId}", "/analyze", "/status"
-        ]
-    }
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 @api_router.get("/markets", response_model=List[MarketData])
+@cache(expire=300)
 async def get_markets():
     """Get available prediction markets"""
     try:
-        return get_markets_service()
+        return await get_markets_service()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching markets: {str(e)}")
 
 @api_router.get("/oracle/{market_id}", response_model=OracleReading)
+@cache(expire=60, key_builder=market_key_builder)
 async def get_oracle_reading(market_id: str):
     """Get latest oracle reading for a specific market"""
     try:
-        return get_oracle_reading_service(market_id)
+        return await run_in_threadpool(get_oracle_reading_service, market_id)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Oracle reading not found: {str(e)}")
 
@@ -81,7 +121,7 @@ async def get_analysis(market_id: str):
 async def analyze_custom_question(query: CustomQueryRequest):
     """Analyze a custom market question with AI"""
     try:
-        return analyze_custom_question_service(query.question)
+        return await analyze_custom_question_service(query.question)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -92,22 +132,32 @@ async def trigger_analysis(background_tasks: BackgroundTasks):
     return {"message": "Analysis started", "status": "processing"}
 
 @api_router.get("/status", response_model=OracleStatus)
+@cache(expire=60)
 async def get_status():
     """Get oracle system status"""
     return get_status_service()
 
+# Health probes arrive every few seconds; reuse the last payload briefly
+HEALTH_CACHE_TTL = 2.0
+_HEALTH_CACHE: tuple = (0.0, {})
+
 @api_router.get("/health")
 async def get_health():
     """Health check endpoint for system monitoring - lightweight check without API calls"""
+    global _HEALTH_CACHE
+    now = time.monotonic()
+    cached_at, cached = _HEALTH_CACHE
+    if now - cached_at < HEALTH_CACHE_TTL:
+        return cached
+    
     try:
         # Get status without triggering expensive API calls
         status = get_status_service()
         
         # Check if we have any cached markets data (don't fetch new)
-        from services.main import markets_cache
-        has_markets = 'markets_data' in markets_cache and len(markets_cache.get('markets_data', [])) > 0
+        has_markets = has_cached_markets()
         
-        return {
+        health = {
             "status": "healthy", 
             "timestamp": int(time.time() * 1000),
             "services": {
@@ -123,6 +173,8 @@ async def get_health():
                 "last_update": status.last_update
             }
         }
+        _HEALTH_CACHE = (now, health)
+        return health
     except Exception as e:
         return {
             "status": "unhealthy",
@@ -149,14 +201,10 @@ async def get_settings():
         raise HTTPException(status_code=500, detail=f"Failed to get settings: {str(e)}")
 
 @api_router.post("/settings")
-async def update_settings(settings: dict):
+async def update_settings(settings: UserSettingsUpdate):
     """Update user settings"""
     try:
-        # Validate settings structure
-        allowed_keys = {"profile", "notifications", "privacy", "api", "display"}
-        if not isinstance(settings, dict) or not any(key in allowed_keys for key in settings.keys()):
-            raise HTTPException(status_code=400, detail="Invalid settings structure")
-        return update_settings_service(settings)
+        return update_settings_service(settings.model_dump(exclude_none=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update settings: {str(e)}")
 
@@ -173,14 +221,16 @@ async def generate_api_key():
 # ======================
 
 @api_router.get("/analytics", response_model=AnalyticsData)
+@cache(expire=300)
 async def get_analytics():
     """Get system analytics data"""
     try:
-        return get_analytics_service()
+        return await get_analytics_service()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
 
 @api_router.get("/analytics/history", response_model=HistoryData)
+@cache(expire=300)
 async def get_history():
     """Get analysis history data"""
     try:
@@ -189,6 +239,7 @@ async def get_history():
         raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
 
 @api_router.get("/analytics/blockchain", response_model=BlockchainData)
+@cache(expire=300)
 async def get_blockchain():
     """Get blockchain transaction data"""
     try:
@@ -197,6 +248,7 @@ async def get_blockchain():
         raise HTTPException(status_code=500, detail=f"Failed to get blockchain data: {str(e)}")
 
 @api_router.get("/metrics", response_model=SystemMetrics)
+@cache(expire=300)
 async def get_metrics():
     """Get detailed system metrics"""
     try:
@@ -208,27 +260,38 @@ async def get_metrics():
 # Enhanced Market Endpoints
 # ======================
 
+# Mock history shape is fixed; only the timestamps move with the clock
+_PRICE_OFFSETS = np.arange(24, 0, -1, dtype=np.int64)
+_PRICES = (0.65 + _PRICE_OFFSETS * 0.01).tolist()
+_VOLUMES = (1000 - _PRICE_OFFSETS * 10).tolist()
+_ANALYSIS_OFFSETS = np.arange(12, 0, -1, dtype=np.int64)
+_CREDIBILITY = np.maximum(50, 85 - _ANALYSIS_OFFSETS * 2).tolist()
+_RISK = np.minimum(50, 15 + _ANALYSIS_OFFSETS).tolist()
+_CONFIDENCE = np.maximum(0.5, 0.9 - _ANALYSIS_OFFSETS * 0.01).tolist()
+
 @api_router.get("/markets/{market_id}/history")
+@cache(expire=3600, key_builder=market_key_builder)
 async def get_market_history(market_id: str):
     """Get historical data for a specific market"""
     try:
         # Mock historical data - in production, fetch from database
-        import time
         now = int(time.time())
+        price_ts = (now - _PRICE_OFFSETS * 3600).tolist()
+        analysis_ts = (now - _ANALYSIS_OFFSETS * 3600).tolist()
         history = {
             "market_id": market_id,
             "price_history": [
-                {"timestamp": now - i * 3600, "price": 0.65 + (i * 0.01), "volume": 1000 - (i * 10)}
-                for i in range(24, 0, -1)
+                {"timestamp": ts, "price": price, "volume": volume}
+                for ts, price, volume in zip(price_ts, _PRICES, _VOLUMES)
             ],
             "analysis_history": [
                 {
-                    "timestamp": now - i * 3600,
-                    "credibility": max(50, 85 - (i * 2)),
-                    "risk": min(50, 15 + i),
-                    "confidence": max(0.5, 0.9 - (i * 0.01))
+                    "timestamp": ts,
+                    "credibility": credibility,
+                    "risk": risk,
+                    "confidence": confidence
                 }
-                for i in range(12, 0, -1)
+                for ts, credibility, risk, confidence in zip(analysis_ts, _CREDIBILITY, _RISK, _CONFIDENCE)
             ]
         }
         return history
@@ -242,12 +305,13 @@ async def get_market_history(market_id: str):
 @api_router.get("/ai/performance")
 async def get_ai_performance_metrics():
     """Get AI performance metrics"""
-    if not ENHANCED_AI_AVAILABLE:
+    mods = _ai_mods()
+    if mods is None:
         raise HTTPException(status_code=503, detail="Enhanced AI features not available")
     
     try:
-        metrics = performance_monitor.get_metrics()
-        suggestions = performance_monitor.get_optimization_suggestions()
+        metrics = await run_in_threadpool(mods.performance_monitor.get_metrics)
+        suggestions = await run_in_threadpool(mods.performance_monitor.get_optimization_suggestions)
         
         return {
             "success": True,
@@ -261,7 +325,8 @@ async def get_ai_performance_metrics():
 @api_router.get("/ai/status")
 async def get_ai_status():
     """Get AI service status and queue information"""
-    if not ENHANCED_AI_AVAILABLE:
+    mods = _ai_mods()
+    if mods is None:
         return {
             "success": True,
             "enhanced_features_enabled": False,
@@ -270,8 +335,8 @@ async def get_ai_status():
         }
     
     try:
-        queue_status = get_processing_status()
-        performance_metrics = performance_monitor.get_metrics()
+        queue_status = mods.get_processing_status()
+        performance_metrics = await run_in_threadpool(mods.performance_monitor.get_metrics)
         
         return {
             "success": True,
@@ -285,13 +350,14 @@ async def get_ai_status():
         raise HTTPException(status_code=500, detail=f"AI status error: {str(e)}")
 
 @api_router.get("/ai/cache/stats")
-async def get_cache_stats():
+async def get_ai_cache_stats():
     """Get AI cache statistics"""
-    if not ENHANCED_AI_AVAILABLE:
+    mods = _ai_mods()
+    if mods is None:
         raise HTTPException(status_code=503, detail="Enhanced AI features not available")
     
     try:
-        stats = ai_cache.get_stats()
+        stats = await run_in_threadpool(mods.ai_cache.get_stats)
         return {
             "success": True,
             "cache_stats": stats
@@ -302,11 +368,12 @@ async def get_cache_stats():
 @api_router.post("/ai/cache/clear")
 async def clear_ai_cache():
     """Clear AI cache"""
-    if not ENHANCED_AI_AVAILABLE:
+    mods = _ai_mods()
+    if mods is None:
         raise HTTPException(status_code=503, detail="Enhanced AI features not available")
     
     try:
-        ai_cache.clear()
+        await run_in_threadpool(mods.ai_cache.clear)
         return {
             "success": True,
             "message": "AI cache cleared successfully"
@@ -317,11 +384,12 @@ async def clear_ai_cache():
 @api_router.post("/ai/queue/flush")
 async def flush_ai_queue():
     """Manually flush the AI processing queue"""
-    if not ENHANCED_AI_AVAILABLE:
+    mods = _ai_mods()
+    if mods is None:
         raise HTTPException(status_code=503, detail="Enhanced AI features not available")
     
     try:
-        results = flush_queue()
+        results = await mods.flush_queue()
         return {
             "success": True,
             "message": f"Queue flushed, processed {len(results)} items",
@@ -333,52 +401,91 @@ async def flush_ai_queue():
 @api_router.get("/ai/config")
 async def get_ai_config():
     """Get current AI configuration"""
-    if not ENHANCED_AI_AVAILABLE:
-        return {
-            "enhanced_features_enabled": False,
-            "config": {
-                "mode": "basic",
-                "features": ["openai_basic"]
-            }
-        }
+    mods = _ai_mods()
+    if mods is None:
+        return Response(_AI_CONFIG_BASIC_BYTES, media_type="application/json")
     
     try:
-        # Read config from ai_config.ini
-        import configparser
-        import os
-        
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'ai_config.ini')
-        config = configparser.ConfigParser()
+        body = await run_in_threadpool(_ai_config_bytes)
+        return Response(body, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Config error: {str(e)}")
+
+@api_router.post("/ai/config/reload")
+async def reload_ai_config():
+    """Re-read ai_config.ini and refresh the cached config response"""
+    mods = _ai_mods()
+    if mods is None:
+        return Response(_AI_CONFIG_BASIC_BYTES, media_type="application/json")
+    
+    try:
+        _ai_config_bytes.cache_clear()
+        body = await run_in_threadpool(_ai_config_bytes)
+        return Response(body, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Config error: {str(e)}")
+
+_AI_CONFIG_BASIC_BYTES = orjson.dumps({
+    "enhanced_features_enabled": False,
+    "config": {
+        "mode": "basic",
+        "features": ["openai_basic"]
+    }
+})
+
+@lru_cache(maxsize=1)
+def _ai_config_bytes() -> bytes:
+    """Serialized /ai/config payload, read from disk once per reload"""
+    return orjson.dumps(_read_ai_config())
+
+def warm_ai_config():
+    """Parse ai_config.ini at startup so the first /ai/config request is served from memory"""
+    if _ai_mods() is not None:
+        _ai_config_bytes()
+
+def _read_ai_config() -> dict:
+    """Read enhanced AI config from ai_config.ini (blocking disk I/O)"""
+    config_path = os.path.join(os.path.dirname(__file__), 'config', 'ai_config.ini')
+    config = configparser.ConfigParser()
+    
+    if os.path.exists(config_path):
+        config.read(config_path)
         
-        if os.path.exists(config_path):
-            config.read(config_path)
-            
-            return {
-                "enhanced_features_enabled": True,
-                "config": {
-                    "cache": dict(config['cache']) if 'cache' in config else {},
-                    "performance": dict(config['performance']) if 'performance' in config else {},
-                    "optimization": dict(config['optimization']) if 'optimization' in config else {}
-                }
+        return {
+            "enhanced_features_enabled": True,
+            "config": {
+                "cache": dict(config['cache']) if 'cache' in config else {},
+                "performance": dict(config['performance']) if 'performance' in config else {},
+                "optimization": dict(config['optimization']) if 'optimization' in config else {}
             }
-        else:
-            return {
-                "enhanced_features_enabled": True,
-                "config": {
-                    "mode": "enhanced",
-                    "message": "Config file not found, using defaults"
-                }
+        }
+    else:
+        return {
+            "enhanced_features_enabled": True,
+            "config": {
+                "mode": "enhanced",
+                "message": "Config file not found, using defaults"
             }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Config error: {str(e)}")
+        }
+
+# Other keys under the FastAPICache prefix in the same Redis DB: the OpenAI L2 cache
+_NON_RESPONSE_PREFIXES = (b"truthlens:oai:",)
+
+async def _response_cache_keys(redis: Redis) -> int:
+    """Number of FastAPICache response entries in Redis (SCAN, so it never blocks the server)"""
+    count = 0
+    async for key in redis.scan_iter(match=f"{FastAPICache.get_prefix()}:*", count=1000):
+        if not key.startswith(_NON_RESPONSE_PREFIXES):
+            count += 1
+    return count
 
 @api_router.get("/cache/stats")
-async def get_cache_stats():
+async def get_extended_cache_stats(redis: Optional[Redis] = Depends(get_redis)):
     """Get cache statistics for monitoring API usage reduction"""
     try:
-        from services import get_cache_stats
-        
-        stats = get_cache_stats()
+        stats = await run_in_threadpool(_services_cache_stats)
+        if redis is not None:
+            stats["response_cache"] = {"backend": "redis", "keys": await _response_cache_keys(redis)}
         return {
             "success": True,
             "cache_stats": stats,
@@ -391,9 +498,8 @@ async def get_cache_stats():
 async def clear_cache():
     """Clear all caches to force fresh data (admin only)"""
     try:
-        from services import clear_all_caches
-        
-        clear_all_caches()
+        await run_in_threadpool(_services_clear_all_caches)
+        await FastAPICache.clear()
         
         return {
             "success": True,
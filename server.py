@@ -13,5 +13,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="uvloop",        # libuv event loop (uvicorn[standard])
+        http="httptools",     # C HTTP parser instead of h11
         log_level="info"
     )
\ No newline at end of file
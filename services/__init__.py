@@ -7,6 +7,7 @@ from .models import (
     CustomQueryResponse,
     OracleStatus,
     UserSettings,
+    UserSettingsUpdate,
     AnalyticsData,
     HistoryData,
     BlockchainData,
@@ -28,7 +29,10 @@ from .main import (
     get_blockchain_service,
     get_metrics_service,
     perform_analysis,
-    periodic_analysis,
+    perform_scheduled_analysis,
+    start_attestation_worker,
+    stop_question_batcher,
+    stop_pin_batcher,
     clear_all_caches,
     get_cache_stats,
 )
@@ -42,6 +46,7 @@ __all__ = [
     'CustomQueryResponse',
     'OracleStatus',
     'UserSettings',
+    'UserSettingsUpdate',
     'AnalyticsData',
     'HistoryData',
     'BlockchainData',
@@ -59,7 +64,10 @@ __all__ = [
     'get_blockchain_service',
     'get_metrics_service',
     'perform_analysis',
-    'periodic_analysis',
+    'perform_scheduled_analysis',
+    'start_attestation_worker',
+    'stop_question_batcher',
+    'stop_pin_batcher',
     'clear_all_caches',
     'get_cache_stats',
 ]
\ No newline at end of file
@@ -5,17 +5,40 @@ Lightweight AI enhancement system for improved performance and accuracy
 while maintaining minimal resource usage.
 """
 
-# Import core components
-try:
-    from .lightweight_enhancer import lightweight_ai
-    from .cache_manager import ai_cache
-    from .batch_processor import queue_analysis, process_urgent, flush_queue, get_processing_status
-    from .performance_monitor import performance_monitor, monitor_performance
-    
-    ENHANCED_AI_AVAILABLE = True
-except ImportError as e:
-    print(f"Enhanced AI services not available: {e}")
-    ENHANCED_AI_AVAILABLE = False
+import importlib
+import logging
+
+logger = logging.getLogger("truthlens.ai")
+
+# Core components are imported on first attribute access so that importing
+# a single submodule (or the package) doesn't pull in every AI service
+_EXPORTS = {
+    'lightweight_ai': '.lightweight_enhancer',
+    'ai_cache': '.cache_manager',
+    'queue_analysis': '.batch_processor',
+    'process_urgent': '.batch_processor',
+    'flush_queue': '.batch_processor',
+    'get_processing_status': '.batch_processor',
+    'performance_monitor': '.performance_monitor',
+    'monitor_performance': '.performance_monitor',
+}
+
+def __getattr__(name):
+    if name == 'ENHANCED_AI_AVAILABLE':
+        try:
+            for module in set(_EXPORTS.values()):
+                importlib.import_module(module, __name__)
+            available = True
+        except ImportError as e:
+            logger.warning("⚠️ Enhanced AI services not available: %s", e)
+            available = False
+        globals()[name] = available
+        return available
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'lightweight_ai',
@@ -1,14 +1,19 @@
 import asyncio
+import heapq
+import itertools
+import logging
+import threading
 import time
-from typing import List, Dict, Any, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 
 from .lightweight_enhancer import lightweight_ai
 from .cache_manager import ai_cache, batch_cache_analysis
 
+logger = logging.getLogger("truthlens.batch")
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BatchAnalysisRequest:
     content: str
     url: str = ""
@@ -22,68 +27,101 @@ class OptimizedBatchProcessor:
     def __init__(self, max_workers: int = 3, batch_size: int = 10):
         self.max_workers = max_workers
         self.batch_size = batch_size
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.processing_queue = []
+        # Bounds concurrent enhanced-AI calls on the shared event loop
+        self.semaphore = asyncio.Semaphore(max_workers)
+        # Priority heap of (priority, sequence, request); sequence keeps FIFO order
+        # within a priority and avoids comparing requests
+        self._heap: List[Tuple[int, int, BatchAnalysisRequest]] = []
+        self._queued: Set[BatchAnalysisRequest] = set()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
         
-    def add_to_queue(self, request: BatchAnalysisRequest):
+    async def add_to_queue(self, request: BatchAnalysisRequest):
         """Add analysis request to processing queue"""
-        self.processing_queue.append(request)
+        with self._lock:
+            # Identical requests already waiting collapse into one
+            if request in self._queued:
+                return None
+            self._queued.add(request)
+            heapq.heappush(self._heap, (request.priority, next(self._sequence), request))
+            batch_full = len(self._heap) >= self.batch_size
         
         # Auto-process when batch is full
-        if len(self.processing_queue) >= self.batch_size:
-            return self.process_batch()
+        if batch_full:
+            return await self.process_batch()
         
         return None
     
-    def process_batch(self) -> List[Dict[str, Any]]:
+    def _drain_queue(self) -> List[BatchAnalysisRequest]:
+        """Pop every queued request in priority order"""
+        with self._lock:
+            heap = self._heap
+            self._queued.clear()
+            return [heapq.heappop(heap)[2] for _ in range(len(heap))]
+    
+    async def process_batch(self) -> List[Dict[str, Any]]:
         """Process entire queue in optimized batches"""
-        if not self.processing_queue:
+        # Drain in priority order; new requests start a fresh batch
+        queue = self._drain_queue()
+        if not queue:
             return []
         
-        # Sort by priority
-        self.processing_queue.sort(key=lambda x: x.priority)
-        
         # Split into batches
         batches = [
-            self.processing_queue[i:i + self.batch_size]
-            for i in range(0, len(self.processing_queue), self.batch_size)
+            queue[i:i + self.batch_size]
+            for i in range(0, len(queue), self.batch_size)
         ]
         
-        all_results = []
-        
-        # Process batches in parallel
-        future_to_batch = {}
-        
-        for batch in batches:
-            future = self.executor.submit(self._process_single_batch, batch)
-            future_to_batch[future] = batch
-        
-        # Collect results
-        for future in as_completed(future_to_batch):
-            batch_results = future.result()
-            all_results.extend(batch_results)
-        
-        # Clear queue
-        self.processing_queue.clear()
+        # Process batches concurrently on the running loop; gather wakes
+        # this coroutine once, after every batch has finished
+        batch_results = await asyncio.gather(
+            *(self._process_single_batch(batch) for batch in batches)
+        )
         
-        return all_results
+        # Flatten in batch order in one pass
+        return list(itertools.chain.from_iterable(batch_results))
     
-    def _process_single_batch(self, batch: List[BatchAnalysisRequest]) -> List[Dict[str, Any]]:
+    async def _process_single_batch(self, batch: List[BatchAnalysisRequest]) -> List[Dict[str, Any]]:
         """Process a single batch efficiently"""
         results = []
         
-        # Prepare batch items for caching analysis
-        batch_items = [(req.content, req.url) for req in batch]
+        # Score manipulation patterns for the whole batch in one pass and
+        # resolve clear-cut items without touching the AI cache
+        pattern_results = lightweight_ai.fast_pattern_analysis_batch([req.content for req in batch])
+        batch_results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        fast_indices = []
+        ai_indices = []
+        for i, (request, pattern_result) in enumerate(zip(batch, pattern_results)):
+            domain_result = lightweight_ai.fast_domain_analysis(request.url) if request.url else {}
+            if self._is_fast_path(pattern_result, domain_result):
+                fast_indices.append(i)
+            else:
+                ai_indices.append(i)
         
-        # Use intelligent batch caching
-        cached_results = batch_cache_analysis(
-            analysis_func=self._analyze_single_item,
-            items=batch_items,
-            ttl=1800
-        )
+        if fast_indices:
+            fallbacks = lightweight_ai.fast_fallback_batch(
+                [(batch[i].content, batch[i].url) for i in fast_indices],
+                [pattern_results[i] for i in fast_indices]
+            )
+            for i, result in zip(fast_indices, fallbacks):
+                result['cache_hit'] = False
+                batch_results[i] = result
+        
+        if ai_indices:
+            # Prepare batch items for caching analysis
+            batch_items = [(batch[i].content, batch[i].url) for i in ai_indices]
+            
+            # Use intelligent batch caching
+            cached_results = await batch_cache_analysis(
+                analysis_func=self._analyze_single_item,
+                items=batch_items,
+                ttl=1800
+            )
+            for i, result in zip(ai_indices, cached_results):
+                batch_results[i] = result
         
         # Combine with request metadata
-        for i, (result, request) in enumerate(zip(cached_results, batch)):
+        for i, (result, request) in enumerate(zip(batch_results, batch)):
             if result:
                 result['market_id'] = request.market_id
                 result['priority'] = request.priority
@@ -92,7 +130,13 @@ class OptimizedBatchProcessor:
         
         return results
     
-    def _analyze_single_item(self, content: str, url: str = "") -> Dict[str, Any]:
+    @staticmethod
+    def _is_fast_path(pattern_result: Dict[str, float], domain_result: Dict[str, float]) -> bool:
+        """High-confidence pattern or domain signals don't need the AI model"""
+        return pattern_result.get('overall_manipulation_risk', 0) > 0.7 or \
+            domain_result.get('domain_score', 50) < 30
+    
+    async def _analyze_single_item(self, content: str, url: str = "") -> Dict[str, Any]:
         """Analyze single item with fallback strategy"""
         try:
             # Try fast pattern analysis first
@@ -100,27 +144,18 @@ class OptimizedBatchProcessor:
             domain_result = lightweight_ai.fast_domain_analysis(url) if url else {}
             
             # If high confidence from patterns, use fast analysis
-            if pattern_result.get('overall_manipulation_risk', 0) > 0.7 or \
-               domain_result.get('domain_score', 50) < 30:
-                return lightweight_ai._fast_fallback_analysis(content, url)
+            if self._is_fast_path(pattern_result, domain_result):
+                return lightweight_ai._fast_fallback_analysis(content, url, pattern_result)
             
             # Otherwise, use enhanced AI if needed
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            try:
-                result = loop.run_until_complete(
-                    lightweight_ai.analyze_content_enhanced(content, url)
-                )
-                return result
-            finally:
-                loop.close()
+            async with self.semaphore:
+                return await lightweight_ai.analyze_content_enhanced(content, url)
                 
         except Exception as e:
-            print(f"Batch analysis error: {e}")
+            logger.warning("Batch analysis error: %s", e)
             return lightweight_ai._fast_fallback_analysis(content, url)
     
-    def process_high_priority(self, requests: List[BatchAnalysisRequest]) -> List[Dict[str, Any]]:
+    async def process_high_priority(self, requests: List[BatchAnalysisRequest]) -> List[Dict[str, Any]]:
         """Fast-track processing for high priority requests"""
         
         # Filter high priority items
@@ -130,26 +165,25 @@ class OptimizedBatchProcessor:
             return []
         
         # Process immediately with maximum parallel execution
-        futures = []
-        
-        for req in high_priority:
-            future = self.executor.submit(
-                self._analyze_single_item, 
-                req.content, 
-                req.url
-            )
-            futures.append((future, req))
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.wait_for(self._analyze_single_item(req.content, req.url), timeout=5)  # 5 second timeout
+                for req in high_priority
+            ),
+            return_exceptions=True
+        )
         
         results = []
-        for future, req in futures:
+        for result, req in zip(outcomes, high_priority):
             try:
-                result = future.result(timeout=5)  # 5 second timeout
+                if isinstance(result, BaseException):
+                    raise result
                 result['market_id'] = req.market_id
                 result['priority'] = req.priority
                 result['fast_track'] = True
                 results.append(result)
             except Exception as e:
-                print(f"High priority analysis failed: {e}")
+                logger.warning("High priority analysis failed: %s", e)
                 # Add fallback result
                 fallback = lightweight_ai._fast_fallback_analysis(req.content, req.url)
                 fallback['market_id'] = req.market_id
@@ -162,24 +196,24 @@ class OptimizedBatchProcessor:
     
     def get_queue_status(self) -> Dict[str, Any]:
         """Get current queue status"""
+        with self._lock:
+            queue_length = len(self._heap)
+            priorities = Counter(priority for priority, _, _ in self._heap)
+        
         return {
-            'queue_length': len(self.processing_queue),
+            'queue_length': queue_length,
             'batch_size': self.batch_size,
             'max_workers': self.max_workers,
             'priority_distribution': {
-                'high': len([r for r in self.processing_queue if r.priority == 1]),
-                'medium': len([r for r in self.processing_queue if r.priority == 2]),
-                'low': len([r for r in self.processing_queue if r.priority == 3])
+                'high': priorities[1],
+                'medium': priorities[2],
+                'low': priorities[3]
             }
         }
     
     def cleanup_cache(self):
         """Clean up expired cache entries"""
         ai_cache.cleanup()
-    
-    def shutdown(self):
-        """Shutdown the batch processor"""
-        self.executor.shutdown(wait=True)
 
 
 # Global batch processor instance
@@ -187,7 +221,7 @@ batch_processor = OptimizedBatchProcessor(max_workers=2, batch_size=5)
 
 
 # Convenience functions for easy integration
-def queue_analysis(content: str, url: str = "", market_id: str = "", priority: int = 2) -> Dict[str, Any]:
+async def queue_analysis(content: str, url: str = "", market_id: str = "", priority: int = 2) -> Dict[str, Any]:
     """Queue content for batch analysis"""
     request = BatchAnalysisRequest(
         content=content,
@@ -196,11 +230,11 @@ def queue_analysis(content: str, url: str = "", market_id: str = "", priority: i
         priority=priority
     )
     
-    result = batch_processor.add_to_queue(request)
+    result = await batch_processor.add_to_queue(request)
     return result or {"queued": True, "status": "pending"}
 
 
-def process_urgent(content: str, url: str = "", market_id: str = "") -> Dict[str, Any]:
+async def process_urgent(content: str, url: str = "", market_id: str = "") -> Dict[str, Any]:
     """Process urgent analysis immediately"""
     request = BatchAnalysisRequest(
         content=content,
@@ -209,13 +243,13 @@ def process_urgent(content: str, url: str = "", market_id: str = "") -> Dict[str
         priority=1
     )
     
-    results = batch_processor.process_high_priority([request])
+    results = await batch_processor.process_high_priority([request])
     return results[0] if results else {"error": "Processing failed"}
 
 
-def flush_queue() -> List[Dict[str, Any]]:
+async def flush_queue() -> List[Dict[str, Any]]:
     """Process all queued items immediately"""
-    return batch_processor.process_batch()
+    return await batch_processor.process_batch()
 
 
 def get_processing_status() -> Dict[str, Any]:
@@ -1,115 +1,178 @@
+import asyncio
 import hashlib
 import json
+import logging
 import time
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from functools import wraps
 import pickle
 import os
+import sqlite3
+import threading
+
+from ..utils.log_filters import RateLimitFilter
+
+logger = logging.getLogger("truthlens.cache")
+logger.addFilter(RateLimitFilter(max_per_sec=10))
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Persistent results are pickled with protocol 5 into a single SQLite table
+PICKLE_PROTOCOL = 5
+CACHE_DB_NAME = "cache.db"
+
+def new_key_hasher():
+    """Non-cryptographic hasher for internal cache keys (xxh3, else BLAKE2b)"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64()
+    return hashlib.blake2b(digest_size=16)
 
 class IntelligentCache:
     """Lightweight caching system for AI results"""
     
-    def __init__(self, cache_dir: str = "cache", default_ttl: int = 3600):
+    def __init__(self, cache_dir: str = "cache", default_ttl: int = 3600, max_entries: int = 10_000):
         self.cache_dir = cache_dir
         self.default_ttl = default_ttl
-        self.memory_cache = {}
+        # key -> (monotonic expiry, data), least recently used first
+        self.memory_cache: OrderedDict = OrderedDict()
+        # Bounded by LRU eviction; expired entries are dropped lazily when read
+        self.max_entries = max_entries
         self._ensure_cache_dir()
+        self._db_lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(self.cache_dir, CACHE_DB_NAME),
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "CREATE TABLE IF NOT EXISTS c(k TEXT PRIMARY KEY, exp REAL, v BLOB);"
+            "CREATE INDEX IF NOT EXISTS c_exp ON c(exp);"
+        )
+        self._remove_legacy_files()
     
     def _ensure_cache_dir(self):
         """Ensure cache directory exists"""
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
     
+    def _remove_legacy_files(self):
+        """Delete per-key .cache pickle files left from before the SQLite store"""
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.cache') and entry.is_file():
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+    
     def _get_cache_key(self, *args, **kwargs) -> str:
         """Generate cache key from function arguments"""
-        key_data = str(args) + str(sorted(kwargs.items()))
-        return hashlib.md5(key_data.encode()).hexdigest()
-    
-    def _get_cache_path(self, cache_key: str) -> str:
-        """Get file path for cache key"""
-        return os.path.join(self.cache_dir, f"{cache_key}.cache")
+        hasher = new_key_hasher()
+        hasher.update(repr((args, tuple(sorted(kwargs.items())))).encode())
+        return hasher.hexdigest()
     
     def get(self, cache_key: str) -> Optional[Dict]:
         """Get cached result"""
         
-        # Check memory cache first
-        if cache_key in self.memory_cache:
-            entry = self.memory_cache[cache_key]
-            if time.time() - entry['timestamp'] < entry['ttl']:
-                return entry['data']
-            else:
-                del self.memory_cache[cache_key]
+        # Check memory cache first: entries are (monotonic expiry, data)
+        entry = self.memory_cache.get(cache_key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.memory_cache.move_to_end(cache_key)
+                return entry[1]
+            del self.memory_cache[cache_key]
         
-        # Check file cache
-        cache_path = self._get_cache_path(cache_key)
-        if os.path.exists(cache_path):
-            try:
-                with open(cache_path, 'rb') as f:
-                    entry = pickle.load(f)
-                
-                if time.time() - entry['timestamp'] < entry['ttl']:
+        # Check persistent cache (expiry stored as wall-clock time)
+        try:
+            with self._db_lock:
+                row = self.conn.execute("SELECT exp, v FROM c WHERE k=?", (cache_key,)).fetchone()
+            if row:
+                remaining = row[0] - time.time()
+                if remaining > 0:
+                    data = pickle.loads(row[1])
                     # Load into memory cache
-                    self.memory_cache[cache_key] = entry
-                    return entry['data']
-                else:
-                    # Remove expired cache
-                    os.remove(cache_path)
-            except Exception as e:
-                print(f"Cache read error: {e}")
+                    self._remember(cache_key, time.monotonic() + remaining, data)
+                    return data
+        except Exception as e:
+            logger.warning("Cache read error: %s", e)
         
         return None
     
     def set(self, cache_key: str, data: Dict, ttl: Optional[int] = None):
         """Set cached result"""
+        self.set_many([(cache_key, data)], ttl)
+    
+    def set_many(self, items: List[Tuple[str, Dict]], ttl: Optional[int] = None):
+        """Set several cached results in one transaction"""
         ttl = ttl or self.default_ttl
+        expiry = time.monotonic() + ttl
+        wall_expiry = time.time() + ttl
+        rows = []
         
-        entry = {
-            'data': data,
-            'timestamp': time.time(),
-            'ttl': ttl
-        }
-        
-        # Store in memory cache
-        self.memory_cache[cache_key] = entry
+        for cache_key, data in items:
+            # Store in memory cache
+            self._remember(cache_key, expiry, data)
+            rows.append((cache_key, wall_expiry, pickle.dumps(data, protocol=PICKLE_PROTOCOL)))
         
-        # Store in file cache for persistence
-        cache_path = self._get_cache_path(cache_key)
+        # Store in SQLite for persistence
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(entry, f)
+            with self._db_lock:
+                self.conn.execute("BEGIN")
+                try:
+                    self.conn.executemany("INSERT OR REPLACE INTO c VALUES(?, ?, ?)", rows)
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                self.conn.execute("COMMIT")
         except Exception as e:
-            print(f"Cache write error: {e}")
+            logger.warning("Cache write error: %s", e)
+    
+    def _remember(self, cache_key: str, expiry: float, data: Dict):
+        """Insert into the memory cache, evicting least recently used entries"""
+        self.memory_cache[cache_key] = (expiry, data)
+        self.memory_cache.move_to_end(cache_key)
+        while len(self.memory_cache) > self.max_entries:
+            self.memory_cache.popitem(last=False)
     
     def cleanup(self):
         """Clean up expired cache entries"""
-        current_time = time.time()
-        
-        # Clean memory cache
-        expired_keys = [
-            key for key, entry in self.memory_cache.items()
-            if current_time - entry['timestamp'] > entry['ttl']
-        ]
+        current_time = time.monotonic()
         
-        for key in expired_keys:
+        # Memory is already bounded by max_entries; this just frees expired slots early
+        expired = [key for key, (expiry, _) in self.memory_cache.items() if expiry < current_time]
+        for key in expired:
             del self.memory_cache[key]
         
-        # Clean file cache
-        if os.path.exists(self.cache_dir):
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.cache'):
-                    filepath = os.path.join(self.cache_dir, filename)
-                    try:
-                        with open(filepath, 'rb') as f:
-                            entry = pickle.load(f)
-                        
-                        if current_time - entry['timestamp'] > entry['ttl']:
-                            os.remove(filepath)
-                    except:
-                        # Remove corrupted cache files
-                        try:
-                            os.remove(filepath)
-                        except:
-                            pass
+        # Indexed sweep of the persistent store
+        with self._db_lock:
+            self.conn.execute("DELETE FROM c WHERE exp < ?", (time.time(),))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and configuration for monitoring"""
+        with self._db_lock:
+            persistent, expired = self.conn.execute(
+                "SELECT COUNT(*), COUNT(CASE WHEN exp < ? THEN 1 END) FROM c", (time.time(),)
+            ).fetchone()
+        return {
+            'memory_entries': len(self.memory_cache),
+            'max_memory_entries': self.max_entries,
+            'persistent_entries': persistent,
+            'expired_entries': expired,
+            'default_ttl': self.default_ttl,
+        }
+    
+    def clear(self):
+        """Drop every cached result from memory and disk"""
+        self.memory_cache.clear()
+        with self._db_lock:
+            self.conn.execute("DELETE FROM c")
 
 # Global cache instance
 ai_cache = IntelligentCache()
@@ -142,38 +205,52 @@ def cached_ai_analysis(ttl: int = 1800):
         return wrapper
     return decorator
 
-def batch_cache_analysis(analysis_func, items: list, ttl: int = 1800) -> list:
-    """Efficient batch processing with caching"""
-    results = []
-    uncached_items = []
-    uncached_indices = []
+async def batch_cache_analysis(analysis_func, items: list, ttl: int = 1800) -> list:
+    """Efficient batch processing with caching (analysis_func is a coroutine function)"""
+    results = [None] * len(items)
+    # cache key -> (call args, indices of items sharing that key)
+    pending: Dict[str, Tuple[tuple, List[int]]] = {}
+    func_name = analysis_func.__name__
     
-    # Check cache for all items
+    # Check cache for all items; identical items share one lookup and one call.
+    # Each key is hashed once here and reused for the write-back below
     for i, item in enumerate(items):
-        cache_key = ai_cache._get_cache_key(analysis_func.__name__, *item if isinstance(item, tuple) else item)
-        cached_result = ai_cache.get(cache_key)
+        args = item if isinstance(item, tuple) else (item,)
+        cache_key = ai_cache._get_cache_key(func_name, *args)
+        if cache_key in pending:
+            pending[cache_key][1].append(i)
+            continue
         
+        cached_result = ai_cache.get(cache_key)
         if cached_result:
             cached_result['cache_hit'] = True
-            results.append(cached_result)
+            results[i] = cached_result
         else:
-            results.append(None)  # Placeholder
-            uncached_items.append(item)
-            uncached_indices.append(i)
+            pending[cache_key] = (args, [i])
     
-    # Process uncached items
-    if uncached_items:
-        for item, index in zip(uncached_items, uncached_indices):
-            if isinstance(item, tuple):
-                result = analysis_func(*item)
-            else:
-                result = analysis_func(item)
-            
+    # Process uncached items concurrently
+    if pending:
+        keys = list(pending)
+        outcomes = await asyncio.gather(
+            *(analysis_func(*pending[key][0]) for key in keys),
+            return_exceptions=True
+        )
+        
+        fresh = []
+        for key, result in zip(keys, outcomes):
+            if isinstance(result, BaseException):
+                logger.warning("Batch item analysis failed: %s", result)
+                continue
             result['cache_hit'] = False
-            results[index] = result
-            
-            # Cache the result
-            cache_key = ai_cache._get_cache_key(analysis_func.__name__, *item if isinstance(item, tuple) else item)
-            ai_cache.set(cache_key, result, ttl)
+            first, *duplicates = pending[key][1]
+            results[first] = result
+            for index in duplicates:
+                # Callers annotate results per request, so duplicates get their own copy
+                results[index] = dict(result)
+            fresh.append((key, result))
+        
+        # Persist all new results in one transaction
+        if fresh:
+            ai_cache.set_many(fresh, ttl)
     
-    return results
\ No newline at end of file
+    return results
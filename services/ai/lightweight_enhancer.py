@@ -1,19 +1,96 @@
 import os
 import json
+import logging
 import time
-import hashlib
+import re
 from typing import Dict, List, Optional, Tuple
 from functools import lru_cache
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 
+import httpx
+import numpy as np
 import requests
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from .cache_manager import new_key_hasher
+from ..utils.log_filters import RateLimitFilter
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 load_dotenv()
 
-@dataclass
+logger = logging.getLogger("truthlens.enhancer")
+logger.addFilter(RateLimitFilter(max_per_sec=10))
+
+# Pattern groups scored by the fast path, with their per-word normalization scale
+PATTERN_GROUPS = ('pump_signals', 'dump_signals', 'urgency_words', 'emotional_triggers')
+PATTERN_SCALES = np.array([0.1, 0.1, 0.05, 0.1])
+
+# Host (netloc) of an absolute URL; anything else falls back to urlparse
+_HOST_RE = re.compile(r'^[a-z][a-z0-9+.\-]*://([^/?#]*)', re.IGNORECASE)
+
+def _score_patterns_numpy(counts: np.ndarray, word_counts: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Vectorized pattern normalization; last column is the overall risk"""
+    norm = np.minimum(1.0, counts / np.maximum(1.0, word_counts[:, None] * scales))
+    return np.column_stack((norm, norm.mean(axis=1)))
+
+def _score_patterns_kernel(counts, word_counts, scales):
+    """Row-parallel pattern normalization compiled with Numba"""
+    n, k = counts.shape
+    out = np.empty((n, k + 1))
+    for i in prange(n):
+        total = 0.0
+        for j in range(k):
+            value = min(1.0, counts[i, j] / max(1.0, word_counts[i] * scales[j]))
+            out[i, j] = value
+            total += value
+        out[i, k] = total / k
+    return out
+
+if NUMBA_AVAILABLE:
+    score_pattern_batch = njit(parallel=True, cache=True)(_score_patterns_kernel)
+else:
+    score_pattern_batch = _score_patterns_numpy
+
+@lru_cache(maxsize=256)
+def _content_hasher(content: str):
+    """Hasher state after `content:`; copied per key so each content is hashed once"""
+    hasher = new_key_hasher()
+    hasher.update(content.encode())
+    hasher.update(b':')
+    return hasher
+
+@dataclass(slots=True, frozen=True)
+class _ContentCtx:
+    """Per-content values shared by the fast pattern paths"""
+    lower: str
+    wc: int
+
+@lru_cache(maxsize=1024)
+def _prep_content(content: str) -> _ContentCtx:
+    """Lowercase and count words once per distinct content"""
+    return _ContentCtx(content.lower(), len(content.split()))
+
+@dataclass(slots=True)
 class AnalysisCache:
     """Lightweight caching for AI results"""
     content_hash: str
@@ -25,7 +102,13 @@ class LightweightAIEnhancer:
     """Enhanced AI with optimizations for low-resource environments"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # One keep-alive HTTP/2 connection pool shared by every AI call
+        self._httpx = httpx.AsyncClient(
+            http2=True,
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+        self.client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=self._httpx)
         self.cache = {}
         self.domain_reputation_cache = {}
         self.pattern_cache = {}
@@ -36,7 +119,9 @@ class LightweightAIEnhancer:
     
     def _get_cache_key(self, content: str, analysis_type: str) -> str:
         """Generate cache key for content"""
-        return hashlib.md5(f"{content}:{analysis_type}".encode()).hexdigest()
+        hasher = _content_hasher(content).copy()
+        hasher.update(analysis_type.encode())
+        return hasher.hexdigest()
     
     def _is_cache_valid(self, cache_entry: AnalysisCache) -> bool:
         """Check if cached result is still valid"""
@@ -71,6 +156,24 @@ class LightweightAIEnhancer:
                 'devastating', 'amazing', 'incredible', 'shocking'
             ]
         }
+        
+        # One compiled alternation over every pattern. The lookahead reports a
+        # match at each position (longest first); patterns contained in a match
+        # are implied by it, so the set of hits equals the per-pattern `in` checks
+        all_patterns = {p for patterns in self.manipulation_patterns.values() for p in patterns}
+        ordered = sorted(all_patterns, key=len, reverse=True)
+        self._pattern_re = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))')
+        self._pattern_implies = {
+            p: frozenset(q for q in all_patterns if q in p) for p in all_patterns
+        }
+        self._pattern_groups = [frozenset(self.manipulation_patterns[g]) for g in PATTERN_GROUPS]
+    
+    def _count_patterns(self, content_lower: str) -> List[int]:
+        """Distinct pattern hits per group, in PATTERN_GROUPS order"""
+        found = set()
+        for match in self._pattern_re.finditer(content_lower):
+            found |= self._pattern_implies[match.group(1)]
+        return [len(found & group) for group in self._pattern_groups]
     
     def load_domain_patterns(self):
         """Load domain reputation patterns"""
@@ -88,62 +191,89 @@ class LightweightAIEnhancer:
                 '.biz', '.info', 'pump.fun'
             ]
         }
+        
+        # Flatten tiers (best first) so a lookup is one pass over the domain
+        tier_results = {
+            'high_reputation': {'domain_score': 85.0, 'confidence': 0.9},
+            'medium_reputation': {'domain_score': 65.0, 'confidence': 0.7},
+            'low_reputation': {'domain_score': 25.0, 'confidence': 0.8},
+        }
+        self._domain_tiers = [
+            (rank, pattern, tier_results[tier])
+            for rank, tier in enumerate(tier_results)
+            for pattern in self.domain_patterns[tier]
+        ]
+        self._domain_ac = None
+        if AHOCORASICK_AVAILABLE:
+            self._domain_ac = ahocorasick.Automaton()
+            for rank, pattern, result in self._domain_tiers:
+                # Keep the best tier when a pattern appears twice
+                if pattern not in self._domain_ac:
+                    self._domain_ac.add_word(pattern, (rank, result))
+            self._domain_ac.make_automaton()
     
     @lru_cache(maxsize=1000)
     def fast_pattern_analysis(self, content: str) -> Dict[str, float]:
         """Lightning-fast pattern-based analysis using cached patterns"""
-        content_lower = content.lower()
-        
-        # Count pattern matches
-        pump_score = sum(1 for pattern in self.manipulation_patterns['pump_signals'] 
-                        if pattern in content_lower)
-        dump_score = sum(1 for pattern in self.manipulation_patterns['dump_signals']
-                        if pattern in content_lower)
-        urgency_score = sum(1 for pattern in self.manipulation_patterns['urgency_words']
-                           if pattern in content_lower)
-        emotion_score = sum(1 for pattern in self.manipulation_patterns['emotional_triggers']
-                           if pattern in content_lower)
-        
-        # Normalize scores (0-1 scale)
-        content_length = len(content.split())
-        pump_norm = min(1.0, pump_score / max(1, content_length * 0.1))
-        dump_norm = min(1.0, dump_score / max(1, content_length * 0.1))
-        urgency_norm = min(1.0, urgency_score / max(1, content_length * 0.05))
-        emotion_norm = min(1.0, emotion_score / max(1, content_length * 0.1))
+        # One scoring path (PATTERN_SCALES) for single and batched content
+        return self.fast_pattern_analysis_batch([content])[0]
+    
+    def fast_pattern_analysis_batch(self, contents: List[str]) -> List[Dict[str, float]]:
+        """Pattern analysis for a whole batch, scored in one vectorized pass"""
+        if not contents:
+            return []
         
-        return {
-            'pump_indicators': pump_norm,
-            'dump_indicators': dump_norm,
-            'urgency_level': urgency_norm,
-            'emotional_manipulation': emotion_norm,
-            'overall_manipulation_risk': (pump_norm + dump_norm + urgency_norm + emotion_norm) / 4
-        }
+        counts = np.empty((len(contents), len(PATTERN_GROUPS)))
+        word_counts = np.empty(len(contents))
+        for i, content in enumerate(contents):
+            ctx = _prep_content(content)
+            counts[i] = self._count_patterns(ctx.lower)
+            word_counts[i] = ctx.wc
+        
+        scores = score_pattern_batch(counts, word_counts, PATTERN_SCALES)
+        return [
+            {
+                'pump_indicators': float(row[0]),
+                'dump_indicators': float(row[1]),
+                'urgency_level': float(row[2]),
+                'emotional_manipulation': float(row[3]),
+                'overall_manipulation_risk': float(row[4])
+            }
+            for row in scores
+        ]
     
     @lru_cache(maxsize=500)
     def fast_domain_analysis(self, url: str) -> Dict[str, float]:
         """Fast domain reputation analysis"""
         try:
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc.lower()
+            match = _HOST_RE.match(url)
+            domain = match.group(1).lower() if match else urlparse(url).netloc.lower()
         except:
             return {'domain_score': 50.0, 'confidence': 0.3}
         
-        # Check cached patterns
-        if any(rep_domain in domain for rep_domain in self.domain_patterns['high_reputation']):
-            return {'domain_score': 85.0, 'confidence': 0.9}
-        elif any(rep_domain in domain for rep_domain in self.domain_patterns['medium_reputation']):
-            return {'domain_score': 65.0, 'confidence': 0.7}
-        elif any(rep_domain in domain for rep_domain in self.domain_patterns['low_reputation']):
-            return {'domain_score': 25.0, 'confidence': 0.8}
+        # Single multi-pattern scan; the best matching tier wins
+        if self._domain_ac is not None:
+            best = min((match for _, match in self._domain_ac.iter(domain)),
+                       key=lambda match: match[0], default=None)
+            if best is not None:
+                return dict(best[1])
         else:
-            return {'domain_score': 50.0, 'confidence': 0.5}
+            for _, pattern, result in self._domain_tiers:
+                if pattern in domain:
+                    return dict(result)
+        
+        return {'domain_score': 50.0, 'confidence': 0.5}
     
-    def enhanced_prompt_template(self, content: str, url: str = "", context: str = "") -> str:
+    def enhanced_prompt_template(self, content: str, url: str = "", context: str = "",
+                                 pattern_analysis: Optional[Dict[str, float]] = None,
+                                 domain_analysis: Optional[Dict[str, float]] = None) -> str:
         """Optimized prompt template for better AI responses"""
         
-        # Get fast pre-analysis
-        pattern_analysis = self.fast_pattern_analysis(content)
-        domain_analysis = self.fast_domain_analysis(url) if url else {}
+        # Get fast pre-analysis (callers may pass results they already have)
+        if pattern_analysis is None:
+            pattern_analysis = self.fast_pattern_analysis(content)
+        if domain_analysis is None:
+            domain_analysis = self.fast_domain_analysis(url) if url else {}
         
         prompt = f"""
 As a financial misinformation detection expert, analyze this content with focus on:
@@ -193,11 +323,19 @@ Focus on the most critical indicators. Be concise but accurate.
             }
         
         try:
+            # Fast pre-analysis, shared by the prompt and the final combination
+            pattern_results = self.fast_pattern_analysis(content)
+            domain_results = self.fast_domain_analysis(url) if url else {}
+            
             # Use enhanced prompt
-            prompt = self.enhanced_prompt_template(content, url)
+            prompt = self.enhanced_prompt_template(
+                content, url,
+                pattern_analysis=pattern_results,
+                domain_analysis=domain_results
+            )
             
             # Optimized API call
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",  # Fastest model
                 messages=[
                     {"role": "system", "content": "You are a concise financial misinformation analyst."},
@@ -213,15 +351,11 @@ Focus on the most critical indicators. Be concise but accurate.
             
             try:
                 # Try to parse JSON
-                result = json.loads(result_text)
+                result = json_loads(result_text)
             except:
                 # Fallback parsing
                 result = self._fallback_parse(result_text, content, url)
             
-            # Enhance with fast pattern analysis
-            pattern_results = self.fast_pattern_analysis(content)
-            domain_results = self.fast_domain_analysis(url) if url else {}
-            
             # Combine results intelligently
             final_result = self._combine_results(result, pattern_results, domain_results)
             
@@ -231,7 +365,7 @@ Focus on the most critical indicators. Be concise but accurate.
             return final_result
             
         except Exception as e:
-            print(f"AI analysis error: {e}")
+            logger.warning("AI analysis error: %s", e)
             # Fast fallback analysis
             return self._fast_fallback_analysis(content, url)
     
@@ -267,26 +401,66 @@ Focus on the most critical indicators. Be concise but accurate.
             'cache_hit': False
         }
     
-    def _fast_fallback_analysis(self, content: str, url: str = "") -> Dict:
+    def _fast_fallback_analysis(self, content: str, url: str = "",
+                                pattern_results: Optional[Dict[str, float]] = None) -> Dict:
         """Ultra-fast fallback when AI is unavailable"""
         
-        pattern_results = self.fast_pattern_analysis(content)
+        if pattern_results is None:
+            pattern_results = self.fast_pattern_analysis(content)
         domain_results = self.fast_domain_analysis(url) if url else {'domain_score': 50}
         
         # Simple scoring logic
         credibility = domain_results['domain_score'] - (pattern_results['overall_manipulation_risk'] * 40)
         manipulation = pattern_results['overall_manipulation_risk'] * 80 + 10
         
+        return self._fallback_result(
+            max(10, min(90, credibility)),
+            max(10, min(90, manipulation)),
+            pattern_results,
+            domain_results,
+            datetime.now().isoformat()
+        )
+    
+    def fast_fallback_batch(self, items: List[Tuple[str, str]],
+                            pattern_results: List[Dict[str, float]]) -> List[Dict]:
+        """Fallback analysis for many (content, url) items, scored as arrays"""
+        if not items:
+            return []
+        
+        domain_results = [
+            self.fast_domain_analysis(url) if url else {'domain_score': 50}
+            for _, url in items
+        ]
+        risk = np.fromiter((p['overall_manipulation_risk'] for p in pattern_results),
+                           dtype=np.float64, count=len(items))
+        domain = np.fromiter((d['domain_score'] for d in domain_results),
+                             dtype=np.float64, count=len(items))
+        
+        # Same scoring as _fast_fallback_analysis, clamped in one pass per column
+        credibility = np.clip(domain - risk * 40, 10, 90).tolist()
+        manipulation = np.clip(risk * 80 + 10, 10, 90).tolist()
+        
+        analysis_time = datetime.now().isoformat()
+        return [
+            self._fallback_result(cred, manip, pattern, domain_result, analysis_time)
+            for cred, manip, pattern, domain_result
+            in zip(credibility, manipulation, pattern_results, domain_results)
+        ]
+    
+    @staticmethod
+    def _fallback_result(credibility: float, manipulation: float, pattern_results: Dict,
+                         domain_results: Dict, analysis_time: str) -> Dict:
+        """Assemble a fallback analysis from already-clamped scores"""
         return {
-            'credibility_score': max(10, min(90, credibility)),
-            'manipulation_risk': max(10, min(90, manipulation)),
+            'credibility_score': credibility,
+            'manipulation_risk': manipulation,
             'confidence': 0.4,
             'reasoning': 'Fallback pattern-based analysis (AI unavailable)',
             'key_indicators': ['pattern-based-analysis'],
             'risk_factors': [k for k, v in pattern_results.items() if v > 0.3],
             'pattern_signals': pattern_results,
             'domain_analysis': domain_results,
-            'analysis_time': datetime.now().isoformat(),
+            'analysis_time': analysis_time,
             'fallback_mode': True
         }
     
@@ -315,19 +489,27 @@ Focus on the most critical indicators. Be concise but accurate.
     
     def batch_analyze(self, contents: List[Tuple[str, str]]) -> List[Dict]:
         """Efficient batch analysis with smart caching"""
-        results = []
+        results = [None] * len(contents)
+        uncached = []
         
-        for content, url in contents:
+        for i, (content, url) in enumerate(contents):
             # Check cache first
             cache_key = self._get_cache_key(f"{content}:{url}", "content")
             
             if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
                 result = self.cache[cache_key].result.copy()
                 result['cache_hit'] = True
-                results.append(result)
+                results[i] = result
             else:
-                # Process non-cached items
-                results.append(self._fast_fallback_analysis(content, url))
+                uncached.append(i)
+        
+        # Process non-cached items, scoring patterns and fallbacks per batch
+        if uncached:
+            uncached_items = [contents[i] for i in uncached]
+            pattern_results = self.fast_pattern_analysis_batch([content for content, _ in uncached_items])
+            fallbacks = self.fast_fallback_batch(uncached_items, pattern_results)
+            for i, result in zip(uncached, fallbacks):
+                results[i] = result
         
         return results
     
@@ -342,7 +524,7 @@ Focus on the most critical indicators. Be concise but accurate.
         for key in expired_keys:
             del self.cache[key]
         
-        print(f"Cleaned {len(expired_keys)} expired cache entries")
+        logger.info("Cleaned %d expired cache entries", len(expired_keys))
 
 # Global instance
 lightweight_ai = LightweightAIEnhancer()
\ No newline at end of file
@@ -1,19 +1,31 @@
+import logging
 import time
 import threading
+from array import array
 from typing import Dict, Any, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from ..utils.log_filters import RateLimitFilter
+
+logger = logging.getLogger("truthlens.monitor")
+logger.addFilter(RateLimitFilter(max_per_sec=10))
+
 # Optional psutil for system monitoring
 try:
     import psutil
     PSUTIL_AVAILABLE = True
 except ImportError:
     PSUTIL_AVAILABLE = False
-    print("psutil not available - system monitoring disabled")
+    logger.warning("psutil not available - system monitoring disabled")
+
+# Slots in PerformanceMonitor._counters
+TOTAL, CACHE_HITS, CACHE_MISSES, AI_CALLS, FALLBACKS, ERRORS = range(6)
 
 
-@dataclass
+@dataclass(slots=True)
 class PerformanceMetrics:
     """Performance metrics for AI operations"""
     total_requests: int = 0
@@ -28,56 +40,74 @@ class PerformanceMetrics:
     timestamp: datetime = None
 
 
+# Flat field list for building metric dicts without dataclasses.asdict
+_METRIC_FIELDS = tuple(f.name for f in fields(PerformanceMetrics))
+
+
 class PerformanceMonitor:
     """Lightweight performance monitoring for AI services"""
     
     def __init__(self):
         self.metrics = PerformanceMetrics()
-        self.request_times = []
         self.max_history = 100
+        self._counters = array('Q', [0] * 6)
+        self._reset_response_times()
         self.lock = threading.Lock()
         
+        # Prime the CPU counter so later non-blocking reads return a delta
+        if PSUTIL_AVAILABLE:
+            psutil.cpu_percent(interval=None)
+        
         # Start monitoring thread
         self.monitoring_active = True
         self.monitor_thread = threading.Thread(target=self._monitor_system, daemon=True)
         self.monitor_thread.start()
     
+    def _reset_response_times(self):
+        """Fixed-size ring buffer of recent response times with a running sum"""
+        self._rt = np.empty(self.max_history, dtype=np.float64)
+        self._rt_head = 0
+        self._rt_count = 0
+        self._rt_sum = 0.0
+    
     def record_request(self, response_time: float, cache_hit: bool = False, 
                       ai_used: bool = False, fallback_used: bool = False, 
                       error_occurred: bool = False):
         """Record metrics for a request"""
         with self.lock:
-            self.metrics.total_requests += 1
-            
-            if cache_hit:
-                self.metrics.cache_hits += 1
-            else:
-                self.metrics.cache_misses += 1
+            # Read the array under the lock so reset_metrics can't swap it mid-update
+            counters = self._counters
+            counters[TOTAL] += 1
+            counters[CACHE_HITS if cache_hit else CACHE_MISSES] += 1
             
             if ai_used:
-                self.metrics.ai_calls_made += 1
+                counters[AI_CALLS] += 1
             
             if fallback_used:
-                self.metrics.fallback_used += 1
+                counters[FALLBACKS] += 1
             
             if error_occurred:
-                self.metrics.error_count += 1
+                counters[ERRORS] += 1
             
-            # Track response times
-            self.request_times.append(response_time)
-            if len(self.request_times) > self.max_history:
-                self.request_times.pop(0)
+            # Track response times, overwriting the oldest once full
+            if self._rt_count == self.max_history:
+                self._rt_sum -= self._rt[self._rt_head]
+            else:
+                self._rt_count += 1
+            self._rt[self._rt_head] = response_time
+            self._rt_sum += response_time
+            self._rt_head = (self._rt_head + 1) % self.max_history
             
             # Update average response time
-            self.metrics.avg_response_time = sum(self.request_times) / len(self.request_times)
+            self.metrics.avg_response_time = self._rt_sum / self._rt_count
     
     def _monitor_system(self):
         """Monitor system resources"""
         while self.monitoring_active:
             try:
                 if PSUTIL_AVAILABLE:
-                    # Get CPU and memory usage
-                    cpu_percent = psutil.cpu_percent(interval=1)
+                    # CPU usage since the previous sample (non-blocking)
+                    cpu_percent = psutil.cpu_percent(interval=None)
                     memory_percent = psutil.virtual_memory().percent
                 else:
                     # Fallback values when psutil not available
@@ -92,13 +122,25 @@ class PerformanceMonitor:
                 time.sleep(5)  # Update every 5 seconds
                 
             except Exception as e:
-                print(f"Performance monitoring error: {e}")
+                logger.warning("Performance monitoring error: %s", e)
                 time.sleep(10)
     
+    def _sync_counters(self):
+        """Copy the request counters onto self.metrics (caller holds the lock)"""
+        counters = self._counters
+        self.metrics.total_requests = counters[TOTAL]
+        self.metrics.cache_hits = counters[CACHE_HITS]
+        self.metrics.cache_misses = counters[CACHE_MISSES]
+        self.metrics.ai_calls_made = counters[AI_CALLS]
+        self.metrics.fallback_used = counters[FALLBACKS]
+        self.metrics.error_count = counters[ERRORS]
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get current performance metrics"""
         with self.lock:
-            metrics_dict = asdict(self.metrics)
+            self._sync_counters()
+            metrics = self.metrics
+            metrics_dict = {name: getattr(metrics, name) for name in _METRIC_FIELDS}
             
             # Add calculated metrics
             total_requests = self.metrics.total_requests
@@ -124,6 +166,18 @@ class PerformanceMonitor:
                 status = "poor"
             
             metrics_dict['performance_status'] = status
+            
+            # Latency percentiles over the recent window
+            if self._rt_count:
+                window = self._rt[:self._rt_count]
+                n = self._rt_count - 1
+                p50_idx, p95_idx = int(n * 0.50), int(n * 0.95)
+                ordered = np.partition(window, (p50_idx, p95_idx))
+                metrics_dict['p50_response_time'] = float(ordered[p50_idx])
+                metrics_dict['p95_response_time'] = float(ordered[p95_idx])
+            else:
+                metrics_dict['p50_response_time'] = 0.0
+                metrics_dict['p95_response_time'] = 0.0
             metrics_dict['timestamp'] = self.metrics.timestamp.isoformat() if self.metrics.timestamp else None
             
             return metrics_dict
@@ -133,6 +187,8 @@ class PerformanceMonitor:
         suggestions = []
         
         with self.lock:
+            self._sync_counters()
+            
             # Cache performance
             if self.metrics.total_requests > 10:
                 cache_rate = (self.metrics.cache_hits / self.metrics.total_requests) * 100
@@ -173,7 +229,8 @@ class PerformanceMonitor:
         """Reset all metrics"""
         with self.lock:
             self.metrics = PerformanceMetrics()
-            self.request_times = []
+            self._counters = array('Q', [0] * 6)
+            self._reset_response_times()
     
     def stop_monitoring(self):
         """Stop performance monitoring"""
@@ -1,38 +1,124 @@
-import json, os
-from web3 import Web3
+import asyncio, os, time
+from functools import lru_cache
+import aiohttp
+import orjson
+from typing import Optional, Tuple
+from eth_account import Account
+from web3 import AsyncWeb3, Web3
+from web3.providers import AsyncHTTPProvider
 from dotenv import load_dotenv
 
+from ..utils.http_session import pooled_session
+
 load_dotenv()
 
 BSC_RPC = os.getenv("BSC_TESTNET_RPC", "https://bsc-testnet.publicnode.com")
 PRIVATE_KEY = os.getenv("ORACLE_SIGNER_KEY")
 CONTRACT_ADDR_RAW = os.getenv("ORACLE_CONTRACT", "0x0000000000000000000000000000000000000000")
 CONTRACT_ADDR = Web3.to_checksum_address(CONTRACT_ADDR_RAW)
+# Fixed per network (97 = BSC testnet), so attestations skip the eth_chainId lookup
+CHAIN_ID = int(os.getenv("BSC_CHAIN_ID", "97"))
+ATTESTATION_GAS = 250000
+
+ABI_PATH = os.path.join(os.path.dirname(__file__), 'abi.json')
+RPC_POOL_SIZE = 50
+
+acct = Account.from_key(PRIVATE_KEY) if PRIVATE_KEY else None
+
+# Providers and the contract are built on first use so chain-free code paths
+# never pay for ABI parsing or provider setup
+
+@lru_cache(maxsize=1)
+def _w3() -> Web3:
+    """One process-wide provider on a pool sized for concurrent attestations"""
+    session = pooled_session(pool_connections=RPC_POOL_SIZE, pool_maxsize=RPC_POOL_SIZE, backoff_factor=0.5)
+    return Web3(Web3.HTTPProvider(BSC_RPC, session=session, request_kwargs={'timeout': 30}))
+
+@lru_cache(maxsize=1)
+def _aw3() -> AsyncWeb3:
+    """Async provider for attestations so independent RPCs can overlap"""
+    return AsyncWeb3(AsyncHTTPProvider(BSC_RPC, request_kwargs={'timeout': aiohttp.ClientTimeout(total=30)}))
+
+@lru_cache(maxsize=1)
+def _contract():
+    with open(ABI_PATH, 'rb') as f:
+        abi = orjson.loads(f.read())
+    return _w3().eth.contract(address=CONTRACT_ADDR, abi=abi)
 
-with open(os.path.join(os.path.dirname(__file__), 'abi.json')) as f:
-    ABI = json.load(f)
+def _encode_abi(fn_name: str, args: list) -> str:
+    contract = _contract()
+    # encode_abi in web3.py v7, encodeABI before that
+    encode = getattr(contract, 'encode_abi', None) or contract.encodeABI
+    return encode(fn_name, args=args)
 
-w3 = Web3(Web3.HTTPProvider(BSC_RPC))
-acct = w3.eth.account.from_key(PRIVATE_KEY) if PRIVATE_KEY else None
-contract = w3.eth.contract(address=CONTRACT_ADDR, abi=ABI)
+# Gas price barely moves on BSC testnet; share one lookup across bursts
+GAS_PRICE_TTL = 15
+_gas_cache = {'ts': 0.0, 'price': None}
+_gas_lock = asyncio.Lock()
+
+async def _cached_gas_price(ttl: float = GAS_PRICE_TTL) -> int:
+    async with _gas_lock:
+        now = time.monotonic()
+        if _gas_cache['price'] is None or now - _gas_cache['ts'] > ttl:
+            _gas_cache.update(price=await _aw3().eth.gas_price, ts=now)
+        return _gas_cache['price']
+
+# Concurrent attestations share one signer, so nonces are handed out locally
+_nonce_lock = asyncio.Lock()
+_next_nonce: Optional[int] = None
+
+async def _allocate_nonce() -> int:
+    global _next_nonce
+    async with _nonce_lock:
+        pending = await _aw3().eth.get_transaction_count(acct.address, 'pending')
+        nonce = pending if _next_nonce is None else max(pending, _next_nonce)
+        _next_nonce = nonce + 1
+        return nonce
+
+def _reset_nonce():
+    """Resync from the chain on the next allocation (e.g. after a failed send left a gap)"""
+    global _next_nonce
+    _next_nonce = None
+
+async def fetch_tx_params() -> Tuple[int, int]:
+    """Fetch (nonce, gas_price) for the signer concurrently"""
+    if not acct:
+        raise ValueError("ORACLE_SIGNER_KEY environment variable is required for blockchain operations")
+    nonce, gas_price = await asyncio.gather(
+        _allocate_nonce(),
+        _cached_gas_price()
+    )
+    return nonce, gas_price
 
-def submit_attestation(market_id_bytes32: bytes, cred: int, risk: int, meta_uri: str = "") -> str:
+async def submit_attestation(market_id_bytes32: bytes, cred: int, risk: int, meta_uri: str = "",
+                             tx_params: Optional[Tuple[int, int]] = None) -> str:
     if not acct:
         raise ValueError("ORACLE_SIGNER_KEY environment variable is required for blockchain operations")
     if not (0 <= cred <= 100) or not (0 <= risk <= 100):
         raise ValueError("Credibility and risk scores must be between 0 and 100")
-    nonce = w3.eth.get_transaction_count(acct.address)
-    tx = contract.functions.submitAttestation(market_id_bytes32, cred, risk, meta_uri).build_transaction({
-        'from': acct.address,
-        'nonce': nonce,
-        'gas': 250000,
-        'gasPrice': w3.eth.gas_price
-    })
-    signed = acct.sign_transaction(tx)
-    # Use signed.raw_transaction for newer web3.py versions, fallback to rawTransaction
-    raw_tx = getattr(signed, 'raw_transaction', getattr(signed, 'rawTransaction', None))
-    tx_hash = w3.eth.send_raw_transaction(raw_tx)
+    # Callers may prefetch tx params to overlap them with other work (e.g. the IPFS upload)
+    nonce, gas_price = tx_params or await fetch_tx_params()
+    try:
+        # Build the tx by hand; build_transaction would re-resolve the function and fetch chainId
+        tx = {
+            'to': CONTRACT_ADDR,
+            'from': acct.address,
+            'nonce': nonce,
+            'gas': ATTESTATION_GAS,
+            'gasPrice': gas_price,
+            'chainId': CHAIN_ID,
+            'value': 0,
+            'data': _encode_abi('submitAttestation', args=[market_id_bytes32, cred, risk, meta_uri]),
+        }
+        signed = acct.sign_transaction(tx)
+        # Use signed.raw_transaction for newer web3.py versions, fallback to rawTransaction
+        raw_tx = getattr(signed, 'raw_transaction', getattr(signed, 'rawTransaction', None))
+        tx_hash = await _aw3().eth.send_raw_transaction(raw_tx)
+    except Exception:
+        # The allocated nonce was never broadcast
+        _reset_nonce()
+        raise
     return tx_hash.hex()
 
 def read_latest(market_id_bytes32: bytes):
-    return contract.functions.latest(market_id_bytes32).call()
\ No newline at end of file
+    return _contract().functions.latest(market_id_bytes32).call()
\ No newline at end of file
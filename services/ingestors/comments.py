@@ -1,22 +1,36 @@
 import os
-import requests
+import asyncio
 import time
 from typing import List, Dict
 import json
 
-def fetch_coingecko_sentiment() -> List[Dict]:
+from .http import get_json
+
+# NewsAPI queries fetched in parallel and merged by article URL
+NEWS_QUERIES = ('bitcoin OR cryptocurrency OR crypto', 'ethereum', 'cryptocurrency regulation')
+
+async def fetch_coingecko_sentiment() -> List[Dict]:
     """Fetch crypto market sentiment from CoinGecko (free, no auth required)"""
+    comments = []
+    now_iso = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    
+    # Trending coins, Bitcoin market data and global market data, fetched concurrently
+    trending_url = "https://api.coingecko.com/api/v3/search/trending"
+    btc_url = "https://api.coingecko.com/api/v3/coins/bitcoin"
+    params = {'localization': 'false', 'tickers': 'false', 'community_data': 'true', 'developer_data': 'false'}
+    global_url = "https://api.coingecko.com/api/v3/global"
+    
+    trending_data, btc_data, global_data = await asyncio.gather(
+        get_json(trending_url, timeout=15),
+        get_json(btc_url, params=params, timeout=15),
+        get_json(global_url, timeout=15),
+        return_exceptions=True
+    )
+    
     try:
-        comments = []
-        
-        # Get trending coins
-        trending_url = "https://api.coingecko.com/api/v3/search/trending"
-        headers = {'Accept': 'application/json'}
-        
-        response = requests.get(trending_url, headers=headers, timeout=15)
-        trending_data = response.json()
-        
-        if 'coins' in trending_data:
+        if isinstance(trending_data, BaseException):
+            print(f"Error fetching CoinGecko trending data: {trending_data}")
+        elif 'coins' in trending_data:
             for coin in trending_data['coins'][:5]:
                 coin_data = coin.get('item', {})
                 comments.append({
@@ -24,19 +38,15 @@ def fetch_coingecko_sentiment() -> List[Dict]:
                     "url": f"https://www.coingecko.com/en/coins/{coin_data.get('id', '')}",
                     "text": f"Trending: {coin_data.get('name', '')} ({coin_data.get('symbol', '')}) - Market cap rank #{coin_data.get('market_cap_rank', 'N/A')}. High search interest indicates potential market movement.",
                     "author": "coingecko_trending",
-                    "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    "createdAt": now_iso,
                     "score": 1000 - (coin_data.get('market_cap_rank', 999) or 999),  # Higher score for lower rank
                     "source": "coingecko_trending"
                 })
         
-        # Get Bitcoin market data for sentiment
-        btc_url = "https://api.coingecko.com/api/v3/coins/bitcoin"
-        params = {'localization': 'false', 'tickers': 'false', 'community_data': 'true', 'developer_data': 'false'}
-        
-        response = requests.get(btc_url, headers=headers, params=params, timeout=15)
-        btc_data = response.json()
-        
-        if 'market_data' in btc_data:
+        # Bitcoin market data for sentiment
+        if isinstance(btc_data, BaseException):
+            print(f"Error fetching CoinGecko Bitcoin data: {btc_data}")
+        elif 'market_data' in btc_data:
             market_data = btc_data['market_data']
             price_change_24h = market_data.get('price_change_percentage_24h', 0)
             sentiment = "bullish" if price_change_24h > 0 else "bearish" if price_change_24h < -2 else "neutral"
@@ -46,17 +56,15 @@ def fetch_coingecko_sentiment() -> List[Dict]:
                 "url": "https://www.coingecko.com/en/coins/bitcoin",
                 "text": f"Bitcoin market analysis: 24h change {price_change_24h:.2f}%. Market sentiment appears {sentiment}. Current market cap rank #1 with strong liquidity indicators.",
                 "author": "coingecko_market_data",
-                "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "createdAt": now_iso,
                 "score": abs(int(price_change_24h * 10)),  # Score based on volatility
                 "source": "coingecko_market"
             })
         
-        # Get global market data
-        global_url = "https://api.coingecko.com/api/v3/global"
-        response = requests.get(global_url, headers=headers, timeout=15)
-        global_data = response.json()
-        
-        if 'data' in global_data:
+        # Global market data
+        if isinstance(global_data, BaseException):
+            print(f"Error fetching CoinGecko global data: {global_data}")
+        elif 'data' in global_data:
             data = global_data['data']
             btc_dominance = data.get('market_cap_percentage', {}).get('btc', 0)
             
@@ -65,54 +73,69 @@ def fetch_coingecko_sentiment() -> List[Dict]:
                 "url": "https://www.coingecko.com/en/global-charts",
                 "text": f"Global crypto market update: Bitcoin dominance at {btc_dominance:.1f}%. Total market cap indicates {'strong' if btc_dominance > 45 else 'moderate'} Bitcoin influence on overall market sentiment.",
                 "author": "coingecko_global",
-                "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "createdAt": now_iso,
                 "score": int(btc_dominance),
                 "source": "coingecko_global"
             })
         
-        return comments
+        if comments or not all(isinstance(r, BaseException) for r in (trending_data, btc_data, global_data)):
+            return comments
         
     except Exception as e:
         print(f"Error fetching CoinGecko data: {e}")
-        # Fallback to mock crypto data
-        return [{
-            "marketId": "bitcoin_market",
-            "url": "https://www.coingecko.com/en/coins/bitcoin",
-            "text": "Mock cryptocurrency market data for testing purposes - Bitcoin trending with positive market sentiment",
-            "author": "coingecko_fallback",
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            "score": 75,
-            "source": "coingecko_fallback"
-        }]
+    
+    # Fallback to mock crypto data
+    return [{
+        "marketId": "bitcoin_market",
+        "url": "https://www.coingecko.com/en/coins/bitcoin",
+        "text": "Mock cryptocurrency market data for testing purposes - Bitcoin trending with positive market sentiment",
+        "author": "coingecko_fallback",
+        "createdAt": now_iso,
+        "score": 75,
+        "source": "coingecko_fallback"
+    }]
 
-def fetch_news_comments() -> List[Dict]:
+async def fetch_news_comments() -> List[Dict]:
     """Fetch crypto news using NewsAPI if available"""
     api_key = os.getenv('NEWS_API_KEY')
     if not api_key or len(api_key.strip()) == 0:  # Check for valid API key
         return []
     
+    now_iso = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    
     try:
         url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': 'bitcoin OR cryptocurrency OR crypto',
-            'language': 'en',
-            'sortBy': 'publishedAt',
-            'pageSize': 10,
-            'apiKey': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        responses = await asyncio.gather(
+            *(get_json(url, params={
+                'q': query,
+                'language': 'en',
+                'sortBy': 'publishedAt',
+                'pageSize': 10,
+                'apiKey': api_key
+            }, timeout=10) for query in NEWS_QUERIES),
+            return_exceptions=True
+        )
         
         comments = []
-        if data.get('status') == 'ok':
+        seen_urls = set()
+        for query, data in zip(NEWS_QUERIES, responses):
+            if isinstance(data, BaseException):
+                print(f"Error fetching news data for '{query}': {data}")
+                continue
+            if data.get('status') != 'ok':
+                continue
             for article in data.get('articles', []):
+                article_url = article.get('url', '')
+                # The queries overlap, so the same article can come back more than once
+                if article_url in seen_urls:
+                    continue
+                seen_urls.add(article_url)
                 comments.append({
                     "marketId": "bitcoin_market",
-                    "url": article.get('url', ''),
+                    "url": article_url,
                     "text": f"{article.get('title', '')} - {article.get('description', '')}",
                     "author": article.get('source', {}).get('name', 'unknown'),
-                    "createdAt": article.get('publishedAt', time.strftime('%Y-%m-%dT%H:%M:%SZ')),
+                    "createdAt": article.get('publishedAt', now_iso),
                     "source": "news"
                 })
         
@@ -124,13 +147,14 @@ def fetch_news_comments() -> List[Dict]:
 
 def get_fallback_comments() -> List[Dict]:
     """Enhanced fallback comments with realistic examples"""
+    now_iso = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
     return [
         {
             "marketId": "bitcoin_market", 
             "url": "https://www.reuters.com/markets/bitcoin-hits-new-high", 
             "text": "Major institutions including BlackRock and Fidelity have increased their Bitcoin holdings by 15% this quarter, according to recent SEC filings. The institutional adoption trend shows strong fundamentals supporting higher prices.", 
             "author": "reuters_reporter", 
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "createdAt": now_iso,
             "source": "fallback"
         },
         {
@@ -138,7 +162,7 @@ def get_fallback_comments() -> List[Dict]:
             "url": "https://www.bloomberg.com/news/crypto-institutional-adoption", 
             "text": "Bloomberg reports that Bitcoin ETF inflows reached $2.1 billion last week, the highest since launch. This represents significant institutional confidence in the asset class.", 
             "author": "bloomberg_analyst", 
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "createdAt": now_iso,
             "source": "fallback"
         },
         {
@@ -146,7 +170,7 @@ def get_fallback_comments() -> List[Dict]:
             "url": "http://shady-crypto-news.biz/blog/123", 
             "text": "🚀🚀🚀 BTC TO THE MOON!!! Trust me bro, my insider friend at Goldman says they're buying MASSIVE amounts. This is going to 100K GUARANTEED!!! 💎🙌", 
             "author": "moon_boy_2024", 
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "createdAt": now_iso,
             "source": "fallback"
         },
         {
@@ -154,7 +178,7 @@ def get_fallback_comments() -> List[Dict]:
             "url": "https://coindesk.com/markets/bitcoin-technical-analysis", 
             "text": "Technical analysis shows BTC broke through key resistance at $75K with strong volume. The 50-day MA crossed above 200-day MA, indicating bullish momentum. However, RSI is approaching overbought territory at 78.", 
             "author": "technical_trader", 
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "createdAt": now_iso,
             "source": "fallback"
         },
         {
@@ -162,35 +186,46 @@ def get_fallback_comments() -> List[Dict]:
             "url": "http://crypto-pump-signals.blogspot.com/btc-pump", 
             "text": "URGENT: Secret whale group just bought 10,000 BTC!!! Get in NOW before it's too late! This is your last chance to buy before we moon! 🌙💰", 
             "author": "whale_watcher_2024", 
-            "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "createdAt": now_iso,
             "source": "fallback"
         }
     ]
 
-def fetch_comments() -> List[Dict]:
+async def fetch_custom_feed() -> List[Dict]:
+    """Fetch comments from the optional custom feed"""
+    url = os.getenv('COMMENTS_FEED_URL')
+    if not url:
+        return []
+    
+    try:
+        return await get_json(url, timeout=10)
+    except Exception as e:
+        print(f"Custom comments feed failed: {e}")
+        return []
+
+async def fetch_comments() -> List[Dict]:
     """Main function to fetch comments with multiple sources"""
     print("💬 Fetching market comments and sentiment data...")
     all_comments = []
     
-    # Try custom feed first
-    url = os.getenv('COMMENTS_FEED_URL')
-    if url:
-        try:
-            response = requests.get(url, timeout=10)
-            custom_comments = response.json()
-            all_comments.extend(custom_comments)
-            print(f"✅ Added {len(custom_comments)} custom feed comments")
-        except Exception as e:
-            print(f"Custom comments feed failed: {e}")
+    # Query every source concurrently
+    custom_comments, coingecko_comments, news_comments = await asyncio.gather(
+        fetch_custom_feed(),
+        fetch_coingecko_sentiment(),
+        fetch_news_comments()
+    )
+    
+    # Custom feed first
+    if custom_comments:
+        all_comments.extend(custom_comments)
+        print(f"✅ Added {len(custom_comments)} custom feed comments")
     
-    # Try CoinGecko
-    coingecko_comments = fetch_coingecko_sentiment()
+    # CoinGecko
     if coingecko_comments:
         all_comments.extend(coingecko_comments)
         print(f"✅ Added {len(coingecko_comments)} CoinGecko sentiment data")
     
-    # Try News API
-    news_comments = fetch_news_comments()
+    # News API
     if news_comments:
         all_comments.extend(news_comments)
         print(f"✅ Added {len(news_comments)} news articles")
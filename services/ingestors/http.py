@@ -0,0 +1,53 @@
+import httpx
+import orjson
+from typing import Any, Dict, Optional, Tuple
+
+# Shared HTTP/2 client for all ingestor calls: concurrent requests to the same
+# host (e.g. the three CoinGecko endpoints) multiplex over one connection.
+# Created lazily and closed on app shutdown.
+_client: Optional[httpx.AsyncClient] = None
+
+# Last validators and decoded body per URL, for conditional re-fetches
+_validated: Dict[str, Tuple[Dict[str, str], Any]] = {}
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            timeout=15,
+            headers={'Accept': 'application/json'},
+        )
+    return _client
+
+async def close_client():
+    """Close the shared AsyncClient"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None, timeout: float = 15) -> Any:
+    """GET a URL on the shared client and decode the JSON body, revalidating with ETag/Last-Modified"""
+    key = str(httpx.URL(url, params=params))
+    cached = _validated.get(key)
+    if cached:
+        headers = {**cached[0], **(headers or {})}
+    
+    response = await get_client().get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        # Unchanged upstream; no body was sent
+        return cached[1]
+    
+    data = orjson.loads(response.content)
+    validators = {}
+    if 'ETag' in response.headers:
+        validators['If-None-Match'] = response.headers['ETag']
+    if 'Last-Modified' in response.headers:
+        validators['If-Modified-Since'] = response.headers['Last-Modified']
+    if validators and response.status_code == 200:
+        _validated[key] = (validators, data)
+    return data
@@ -1,8 +1,15 @@
 import os
-import requests
+import numpy as np
 from typing import List, Dict
 
-def fetch_coingecko_data() -> List[Dict]:
+from .http import get_json
+
+# Shape of the simulated 7-point price/volume history, shared by every coin
+_HISTORY_STEPS = np.arange(7)
+_PRICE_RAMP = _HISTORY_STEPS / 6
+_VOLUME_FACTOR = 1 + 0.1 * (0.5 - (_HISTORY_STEPS % 3) / 6)
+
+async def fetch_coingecko_data() -> List[Dict]:
     """Fetch real-time crypto market data from CoinGecko (free)"""
     try:
         url = "https://api.coingecko.com/api/v3/simple/price"
@@ -14,8 +21,7 @@ def fetch_coingecko_data() -> List[Dict]:
             'include_market_cap': 'true'
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        data = await get_json(url, params=params, timeout=10)
         
         markets = []
         for coin_id, coin_data in data.items():
@@ -23,20 +29,12 @@ def fetch_coingecko_data() -> List[Dict]:
             current_price = coin_data['usd']
             change_24h = coin_data.get('usd_24h_change', 0)
             
-            # Simulate price history
-            price_24h = []
-            for i in range(7):  # Last 7 data points
-                variance = (change_24h / 100) * (i / 6)
-                historical_price = current_price * (1 - variance)
-                price_24h.append(round(historical_price, 2))
+            # Simulate price history (last 7 data points)
+            price_24h = np.round(current_price * (1 - (change_24h / 100) * _PRICE_RAMP), 2).tolist()
             
             # Simulate volume history
             current_volume = coin_data.get('usd_24h_vol', 1000000)
-            volume_24h = []
-            for i in range(7):
-                volume_variance = 0.1 * (0.5 - (i % 3) / 6)
-                volume = current_volume * (1 + volume_variance)
-                volume_24h.append(int(volume))
+            volume_24h = (current_volume * _VOLUME_FACTOR).astype(np.int64).tolist()
             
             markets.append({
                 "marketId": f"{coin_id.replace('-', '_')}_market",
@@ -66,7 +64,7 @@ def get_fallback_data() -> List[Dict]:
         "change_24h": 2.5
     }]
 
-def fetch_markets() -> List[Dict]:
+async def fetch_markets() -> List[Dict]:
     """Main function to fetch market data with multiple fallbacks"""
     print("📊 Fetching real-time market data from external APIs...")
     
@@ -74,14 +72,14 @@ def fetch_markets() -> List[Dict]:
     url = os.getenv('MARKET_FEED_URL')
     if url:
         try:
-            response = requests.get(url, timeout=10)
+            markets = await get_json(url, timeout=10)
             print("✅ Using custom market feed")
-            return response.json()
+            return markets
         except Exception as e:
             print(f"Custom feed failed: {e}")
     
     # Try CoinGecko (rate limited - use sparingly)
-    coingecko_data = fetch_coingecko_data()
+    coingecko_data = await fetch_coingecko_data()
     if coingecko_data and len(coingecko_data) > 0:
         print(f"✅ Using CoinGecko data ({len(coingecko_data)} markets) - API call made")
         return coingecko_data
@@ -1,7 +1,15 @@
 from typing import Optional, Dict, List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-class MarketData(BaseModel):
+class ResponseModel(BaseModel):
+    """Immutable outbound payload; built once and only serialized afterwards
+
+    Payloads assembled from already-validated internal state use model_construct(),
+    since FastAPI validates against the response_model on the way out anyway.
+    """
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+class MarketData(ResponseModel):
     market_id: str
     name: str
     question: str
@@ -11,7 +19,7 @@ class MarketData(BaseModel):
     market_cap: float
     change_24h: float
 
-class OracleReading(BaseModel):
+class OracleReading(ResponseModel):
     market_id: str
     cred_score: int
     risk_index: int
@@ -32,7 +40,7 @@ class AnalysisResult(BaseModel):
 class CustomQueryRequest(BaseModel):
     question: str
 
-class CustomQueryResponse(BaseModel):
+class CustomQueryResponse(ResponseModel):
     answer: str
     confidence: float
     sources: List[str]
@@ -52,7 +60,16 @@ class UserSettings(BaseModel):
     api: Dict
     display: Dict
 
-class AnalyticsData(BaseModel):
+class UserSettingsUpdate(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    profile: Optional[Dict] = None
+    notifications: Optional[Dict] = None
+    privacy: Optional[Dict] = None
+    api: Optional[Dict] = None
+    display: Optional[Dict] = None
+
+class AnalyticsData(ResponseModel):
     markets_analyzed: int
     success_rate: float
     avg_confidence: float
@@ -60,17 +77,17 @@ class AnalyticsData(BaseModel):
     performance_metrics: Dict
     time_series: List[Dict]
 
-class HistoryData(BaseModel):
+class HistoryData(ResponseModel):
     analyses: List[Dict]
     total_count: int
     
-class BlockchainData(BaseModel):
+class BlockchainData(ResponseModel):
     transactions: List[Dict]
     total_attestations: int
     contract_address: str
     network: str
 
-class SystemMetrics(BaseModel):
+class SystemMetrics(ResponseModel):
     uptime: int
     request_count: int
     error_rate: float
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Any, Optional
+
+import orjson
+from cachetools import TTLCache
+
+# Optional shared L2 so analyses survive restarts and are reused across workers
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger("truthlens.oai_cache")
+
+OAI_CACHE_TTL = 604800  # 7 days; GPT verdicts on a given source/question rarely change
+OAI_CACHE_SIZE = 2048
+FUZZY_TEXT_CHARS = 512  # Normalized prefix length used to match near-duplicate comments
+
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_PREFIX = "truthlens:oai:"
+
+_l1 = TTLCache(maxsize=OAI_CACHE_SIZE, ttl=OAI_CACHE_TTL)
+_l1_lock = threading.RLock()
+_l2 = None
+
+_WHITESPACE = re.compile(r"\s+")
+
+def make_key(*parts: str) -> str:
+    """SHA-256 cache key over the '|'-joined parts (e.g. model, system prompt, user prompt)"""
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and truncate so near-duplicate comments share a key"""
+    return _WHITESPACE.sub(" ", text.lower()).strip()[:FUZZY_TEXT_CHARS]
+
+def _redis():
+    """Lazily connect the L2 client; None when Redis is unset or unavailable"""
+    global _l2
+    if _l2 is None and REDIS_AVAILABLE and REDIS_URL:
+        _l2 = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+    return _l2
+
+def lookup(key: str) -> Optional[Any]:
+    """Look a key up in L1, then L2 (promoting L2 hits into L1)"""
+    with _l1_lock:
+        value = _l1.get(key)
+    if value is not None:
+        return value
+    client = _redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(REDIS_PREFIX + key)
+    except redis.RedisError as e:
+        logger.warning("⚠️ OpenAI cache L2 read failed: %s", e)
+        return None
+    if raw is None:
+        return None
+    value = orjson.loads(raw)
+    with _l1_lock:
+        _l1[key] = value
+    return value
+
+def store(key: str, value: Any):
+    """Store a JSON-serializable value in L1 and, when configured, L2"""
+    with _l1_lock:
+        _l1[key] = value
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.setex(REDIS_PREFIX + key, OAI_CACHE_TTL, orjson.dumps(value))
+    except redis.RedisError as e:
+        logger.warning("⚠️ OpenAI cache L2 write failed: %s", e)
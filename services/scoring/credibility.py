@@ -1,4 +1,15 @@
-from .openai_nlp import analyze_content_credibility, analyze_domain_credibility
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TTLCache
+
+from .openai_nlp import analyze_content_credibility_batch, analyze_domain_credibility
+from ..utils.urls import url_host
+
+logger = logging.getLogger("truthlens.scoring")
 
 def has_numeric(text: str) -> bool:
     return any(ch.isdigit() for ch in text) or ('%' in text) or ('$' in text)
@@ -9,16 +20,31 @@ def has_quote(text: str) -> bool:
 REPUTABLE = ("reuters", "bbc", "apnews", "bloomberg", "ft.com", "wsj.com")
 LOWREP = (".biz", "blogspot", "substack", "telegram", "t.me")
 
+# One compiled alternation per list instead of a Python-level any() over substrings
+_REP_RE = re.compile("|".join(map(re.escape, REPUTABLE)))
+_LOW_RE = re.compile("|".join(map(re.escape, LOWREP)))
+
+# Domain checks (VirusTotal, OpenPageRank, OpenAI) are independent per URL, so fan them out
+DOMAIN_ANALYSIS_WORKERS = 8
+_domain_pool = ThreadPoolExecutor(max_workers=DOMAIN_ANALYSIS_WORKERS, thread_name_prefix="domain-analysis")
+
+# (content, domain) analysis pair per comment, reused across markets and periodic runs
+CREDIBILITY_ENTRY_TTL = 7200  # Matches the service layer's ANALYSIS_CACHE_TTL
+_entry_cache = TTLCache(maxsize=5000, ttl=CREDIBILITY_ENTRY_TTL)
+_entry_lock = threading.Lock()
+
+def _entry_key(text: str, url: str) -> bytes:
+    """blake2b digest of a comment's URL and text, NUL-separated so the boundary can't shift"""
+    return hashlib.blake2b(url.encode('utf-8') + b"\x00" + text.encode('utf-8'), digest_size=16).digest()
+
 def domain_reputation_fallback(url: str) -> int:
     """Fallback domain scoring when OpenAI is not available"""
-    try:
-        from urllib.parse import urlparse
-        host = urlparse(url).netloc.lower()
-    except Exception:
+    host = url_host(url)
+    if host is None:
         return 20
-    if any(k in host for k in REPUTABLE):
+    if _REP_RE.search(host):
         return 90
-    if any(k in host for k in LOWREP):
+    if _LOW_RE.search(host):
         return 30
     return 55
 
@@ -35,23 +61,33 @@ def credibility_score(comments: list[dict]):
     n = 0
     all_reasoning = []
     
-    print("  🤖 Using OpenAI for advanced credibility analysis...")
+    logger.debug("  🤖 Using OpenAI for advanced credibility analysis...")
     
-    for c in comments:
-        url = c.get('url')
-        text = c.get('text', '')
-        
-        if not url:
-            continue
-            
-        # Use OpenAI for comprehensive analysis
-        print(f"    📊 Analyzing: {url[:50]}...")
-        
-        # Analyze content credibility
-        content_analysis = analyze_content_credibility(text, url)
-        
-        # Analyze domain credibility
-        domain_analysis = analyze_domain_credibility(url)
+    links = [(c.get('text', ''), c['url']) for c in comments if c.get('url')]
+    
+    keys = [_entry_key(text, url) for text, url in links]
+    with _entry_lock:
+        entries = [_entry_cache.get(key) for key in keys]
+    # Each distinct uncached (url, text) is analyzed once; reposted duplicates replay its result
+    first_miss = {}
+    for i, entry in enumerate(entries):
+        if entry is None:
+            first_miss.setdefault(keys[i], i)
+    misses = list(first_miss.values())
+    
+    # Content: batched OpenAI calls; domains: concurrent lookups
+    domain_futures = {i: _domain_pool.submit(analyze_domain_credibility, links[i][1]) for i in misses}
+    content_analyses = analyze_content_credibility_batch([links[i] for i in misses])
+    analyzed = {}
+    for i, content_analysis in zip(misses, content_analyses):
+        analyzed[keys[i]] = (content_analysis, domain_futures[i].result())
+    if analyzed:
+        with _entry_lock:
+            _entry_cache.update(analyzed)
+        entries = [entry if entry is not None else analyzed[key] for entry, key in zip(entries, keys)]
+    
+    for (text, url), (content_analysis, domain_analysis) in zip(links, entries):
+        logger.debug("    📊 Analyzing: %.50s...", url)
         
         # Combine scores with confidence weighting
         content_score = content_analysis['credibility_score']
@@ -85,15 +121,14 @@ def credibility_score(comments: list[dict]):
         all_reasoning.extend(domain_analysis['reasoning'][:1])
         
         # Show analysis details
-        print(f"      Content Score: {content_score} (confidence: {content_confidence:.2f})")
-        print(f"      Domain Score: {domain_score} (confidence: {domain_confidence:.2f})")
-        print(f"      Combined: {round(combined_score)}")
+        logger.debug("      Content Score: %s (confidence: %.2f) | Domain Score: %s (confidence: %.2f) | Combined: %d",
+                     content_score, content_confidence, domain_score, domain_confidence, round(combined_score))
         
         if content_analysis['bias_indicators']:
-            print(f"      🚨 Bias indicators: {', '.join(content_analysis['bias_indicators'][:2])}")
+            logger.debug("      🚨 Bias indicators: %s", content_analysis['bias_indicators'][:2])
         
         if content_analysis['emotional_manipulation'] > 0.7:
-            print(f"      ⚠️ High emotional manipulation detected ({content_analysis['emotional_manipulation']:.2f})")
+            logger.debug("      ⚠️ High emotional manipulation detected (%.2f)", content_analysis['emotional_manipulation'])
     
     # Calculate aggregate score
     aggregate = round(total_score / n) if n else 50
@@ -107,10 +142,16 @@ def credibility_score(comments: list[dict]):
         "Detected bias patterns and emotional manipulation signals."
     ]
     
-    # Add top specific insights
-    unique_reasoning = list(dict.fromkeys(all_reasoning))[:3]
-    reasons.extend(unique_reasoning)
+    # Add top specific insights (first 3 distinct, stopping as soon as they are found)
+    seen, top3 = set(), []
+    for r in all_reasoning:
+        if r not in seen:
+            seen.add(r)
+            top3.append(r)
+            if len(top3) == 3:
+                break
+    reasons.extend(top3)
     
-    print(f"  🎯 Final credibility score: {aggregate}/100 (confidence: {avg_confidence:.2f})")
+    logger.debug("  🎯 Final credibility score: %d/100 (confidence: %.2f)", aggregate, avg_confidence)
     
     return aggregate, per_link, reasons
\ No newline at end of file
@@ -1,21 +1,89 @@
+import hashlib
+import logging
+import threading
+
 import numpy as np
-from .openai_nlp import analyze_market_sentiment
+from cachetools import TTLCache
+
+from .openai_nlp import analyze_market_sentiment_checked
+
+logger = logging.getLogger("truthlens.scoring")
+
+# Last sentiment per market, reused while its comments are unchanged (comments evolve slowly);
+# must outlive the hourly scheduler interval or every run finds the entry expired
+SENTIMENT_REUSE_TTL = 7200  # Matches the service layer's ANALYSIS_CACHE_TTL
+_last_sentiment = TTLCache(maxsize=1024, ttl=SENTIMENT_REUSE_TTL)  # market_id -> (comments_hash, analysis)
+_sentiment_lock = threading.Lock()
+
+def _comments_hash(question: str, comments: list) -> bytes:
+    """8-byte blake2b digest of the market question plus comment authors/texts, in order"""
+    h = hashlib.blake2b(question.encode('utf-8'), digest_size=8)
+    for c in comments:
+        h.update(b"\x00" + str(c.get('author') or '').encode('utf-8') + b"\x01" + c.get('text', '').encode('utf-8'))
+    return h.digest()
+
+def _market_sentiment(market: dict, comments: list) -> dict:
+    """analyze_market_sentiment, skipped when this market's comments match the previous run"""
+    market_id = market.get('marketId')
+    question = market.get('question', 'Market prediction')
+    h = _comments_hash(question, comments)
+    with _sentiment_lock:
+        previous = _last_sentiment.get(market_id)
+    if previous is not None and previous[0] == h:
+        return previous[1]
+    analysis, from_model = analyze_market_sentiment_checked(comments, question)
+    # Fallbacks are not reused, so one OpenAI error doesn't stick for the whole TTL
+    if from_model:
+        with _sentiment_lock:
+            _last_sentiment[market_id] = (h, analysis)
+    return analysis
 
 def zscores(arr):
-    arr = np.array(arr, dtype=float)
-    if arr.size == 0:
-        return arr
-    m, s = arr.mean(), arr.std()
-    return (arr - m) / s if s else np.zeros_like(arr)
+    a = np.asarray(arr, dtype=np.float32)
+    if a.size == 0:
+        return a
+    m, s = a.mean(), a.std()
+    if not s:
+        return np.zeros_like(a)
+    out = np.empty_like(a)
+    np.subtract(a, m, out=out)
+    out /= s
+    return out
+
+def last_abs_zscore(arr) -> float:
+    """|z| of the newest sample only, without materializing the full z-score array"""
+    a = np.asarray(arr, dtype=np.float32)
+    if a.size == 0:
+        return 0
+    s = a.std()
+    return float(abs((a[-1] - a.mean()) / s)) if s else 0.0
 
-def risk_score(market: dict, link_quality_variance: int = 20, comments: list = None):
-    print("  🤖 Using OpenAI for advanced risk analysis...")
+def batch_features(markets: list) -> np.ndarray:
+    """(N, 2) float32 array of |z| for each market's newest price and volume sample"""
+    out = np.zeros((len(markets), 2), dtype=np.float32)
+    for col, key in enumerate(('price24h', 'volume24h')):
+        series = [m.get(key, []) for m in markets]
+        lengths = {len(x) for x in series}
+        if len(lengths) == 1 and 0 not in lengths:
+            # Equal-length histories stack into one (N, T) matrix: a single vectorized pass
+            P = np.asarray(series, dtype=np.float32)
+            std = P.std(axis=1)
+            last = P[:, -1] - P.mean(axis=1)
+            np.abs(np.divide(last, std, out=np.zeros_like(last), where=std != 0), out=out[:, col])
+        else:
+            out[:, col] = [last_abs_zscore(x) for x in series]
+    return out
+
+def risk_score(market: dict, link_quality_variance: int = 20, comments: list = None, features=None):
+    """features: this market's row from batch_features(); computed here when omitted"""
+    logger.debug("  🤖 Using OpenAI for advanced risk analysis...")
     
     # On-chain anomaly detection (unchanged)
-    pz = zscores(market.get('price24h', []))
-    vz = zscores(market.get('volume24h', []))
-    last_p = abs(pz[-1]) if pz.size else 0
-    last_v = abs(vz[-1]) if vz.size else 0
+    if features is not None:
+        last_p, last_v = float(features[0]), float(features[1])
+    else:
+        last_p = last_abs_zscore(market.get('price24h', []))
+        last_v = last_abs_zscore(market.get('volume24h', []))
     onchain_anomaly = min(100, round(60 + 10*max(last_p, last_v)))
     
     # Order flow imbalance (placeholder - could be enhanced with real data)
@@ -23,8 +91,7 @@ def risk_score(market: dict, link_quality_variance: int = 20, comments: list = N
     
     # Advanced sentiment analysis with OpenAI
     if comments:
-        market_question = market.get('question', 'Market prediction')
-        sentiment_analysis = analyze_market_sentiment(comments, market_question)
+        sentiment_analysis = _market_sentiment(market, comments)
         
         # Convert sentiment analysis to risk components
         manipulation_risk_component = sentiment_analysis['manipulation_risk'] * 100
@@ -42,13 +109,12 @@ def risk_score(market: dict, link_quality_variance: int = 20, comments: list = N
             0.2 * coordination_penalty
         ))
         
-        print(f"    📊 Sentiment score: {sentiment_analysis['sentiment_score']:.2f}")
-        print(f"    🎯 Manipulation risk: {sentiment_analysis['manipulation_risk']:.2f}")
-        print(f"    🤝 Coordinated activity: {sentiment_analysis['coordinated_activity']}")
-        print(f"    📈 Sentiment volatility component: {sentiment_volatility}")
+        logger.debug("    📊 Sentiment score: %.2f | 🎯 Manipulation risk: %.2f | 🤝 Coordinated activity: %s | 📈 Sentiment volatility component: %s",
+                     sentiment_analysis['sentiment_score'], sentiment_analysis['manipulation_risk'],
+                     sentiment_analysis['coordinated_activity'], sentiment_volatility)
         
         if sentiment_analysis['patterns']:
-            print(f"    🔍 Detected patterns: {', '.join(sentiment_analysis['patterns'][:2])}")
+            logger.debug("    🔍 Detected patterns: %s", sentiment_analysis['patterns'][:2])
             
     else:
         sentiment_volatility = 30  # fallback
@@ -87,6 +153,6 @@ def risk_score(market: dict, link_quality_variance: int = 20, comments: list = N
         if abs(sentiment_analysis['sentiment_score']) > 0.8:
             reasons.append("📊 Extreme sentiment detected (potential manipulation)")
     
-    print(f"  🎯 Final risk score: {risk}/100")
+    logger.debug("  🎯 Final risk score: %d/100", risk)
     
     return risk, reasons
\ No newline at end of file
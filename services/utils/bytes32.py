@@ -1,8 +1,7 @@
+from binascii import unhexlify
+
 def to_bytes32(s: str) -> bytes:
-    if s.startswith("0x") and len(s) == 66:
-        return bytes.fromhex(s[2:])
+    if len(s) == 66 and s[:2] == "0x":
+        return unhexlify(s[2:])
     b = s.encode('utf-8')
-    pad = 32 - len(b)
-    if pad < 0:
-        return b[:32]
-    return b + bytes([0]) * pad
\ No newline at end of file
+    return b[:32] if len(b) >= 32 else b.ljust(32, b"\x00")
\ No newline at end of file
@@ -0,0 +1,29 @@
+import atexit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+def pooled_session(pool_connections: int = 10, pool_maxsize: int = 20,
+                   retries: int = 3, backoff_factor: float = 0.3,
+                   status_forcelist: tuple = (),
+                   allowed_methods: frozenset = Retry.DEFAULT_ALLOWED_METHODS,
+                   raise_on_status: bool = True) -> requests.Session:
+    """Build a keep-alive requests.Session with a sized pool and idempotent retries"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=allowed_methods,
+            respect_retry_after_header=True,
+            raise_on_status=raise_on_status,
+        ),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    atexit.register(session.close)
+    return session
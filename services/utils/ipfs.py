@@ -1,116 +1,257 @@
+import asyncio
+import base64
+import hashlib
 import os
-import json
-import requests
-from io import BytesIO
+import queue
+import logging
+import sys
+import threading
+import time
+import httpx
+import orjson
+from cachetools import LRUCache
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache, wraps
+from dotenv import load_dotenv
+from typing import Callable, List, Optional
 
+from .http_session import pooled_session
+from ..ingestors.http import get_client
+
+logger = logging.getLogger("truthlens.ipfs")
+
+load_dotenv()
+
+# Provider credentials, read once at import
+PINATA_JWT = os.getenv('PINATA_JWT')
+WEB3STORAGE_TOKEN = os.getenv('WEB3STORAGE_TOKEN')
+NFT_STORAGE_TOKEN = os.getenv('NFT_STORAGE_TOKEN')
+INFURA_PROJECT_ID = os.getenv('INFURA_PROJECT_ID')
+INFURA_PROJECT_SECRET = os.getenv('INFURA_PROJECT_SECRET')
+
+# Separate connect/read limits so a stalled provider fails fast into retries/breakers
+IPFS_CONNECT_TIMEOUT = float(os.getenv('IPFS_CONNECT_TIMEOUT', '3'))
+IPFS_READ_TIMEOUT = float(os.getenv('IPFS_READ_TIMEOUT', '10'))
+_HTTP_TIMEOUT = (IPFS_CONNECT_TIMEOUT, IPFS_READ_TIMEOUT)
+_ASYNC_TIMEOUT = httpx.Timeout(IPFS_READ_TIMEOUT, connect=IPFS_CONNECT_TIMEOUT)
+
+# Keep-alive connections to the pinning APIs, reused across uploads. Pins are
+# content-addressed, so re-POSTing after a 429/5xx or dropped connection yields the
+# same CID; Retry-After is honoured and 401/403/other 4xx fail fast
+IPFS_RETRIES = 3
+IPFS_BACKOFF = 1.0  # Seconds; doubles per attempt
+IPFS_RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+_SESSION = pooled_session(
+    retries=IPFS_RETRIES,
+    backoff_factor=IPFS_BACKOFF,
+    status_forcelist=IPFS_RETRY_STATUSES,
+    allowed_methods=frozenset({"GET", "POST"}),
+    raise_on_status=False,  # Hand the final response back so callers log/fall back as before
+)
+
+# Deterministic key order for pinned metadata; scores may arrive as NumPy scalars
+_JSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Constant parts of the Pinata pin options/metadata, serialized once
+_PINATA_OPTIONS = {"cidVersion": 1}
+_PINATA_OPTIONS_JSON = orjson.dumps(_PINATA_OPTIONS)
+_PINATA_KEYVALUES = {"service": "TruthLens", "type": "attestation-metadata"}
+
+# Async uploads race the configured providers on the shared HTTP/2 client
+IPFS_UPLOAD_CONCURRENCY = 5  # In-flight provider POSTs across all attestations
+_upload_slots = asyncio.Semaphore(IPFS_UPLOAD_CONCURRENCY)
+
+# Concurrent market analyses pin their metadata as files of one Pinata directory per batch
+IPFS_BATCH_SIZE = 32  # Max metadata files per pinFileToIPFS request
+IPFS_BATCH_WINDOW = 0.1  # Seconds to wait for more uploads to join a batch
+_PIN_BATCH_DIR = "truthlens"
+_pin_queue: asyncio.Queue = asyncio.Queue()  # (metadata, future) pairs waiting to join a batch
+_pin_batcher: Optional[asyncio.Task] = None
+_pin_batches: set = set()  # Batches currently uploading
+
+# Bulkhead for sync callers that only need the CID eventually; workers start on first use
+IPFS_BACKGROUND_WORKERS = 4
+IPFS_BACKGROUND_QUEUE_SIZE = 256  # When full, the oldest pending upload is dropped
+_background_queue: queue.Queue = queue.Queue(maxsize=IPFS_BACKGROUND_QUEUE_SIZE)
+_background_workers: List[threading.Thread] = []
+_background_lock = threading.Lock()
+
+# Threaded equivalent for synchronous callers (scripts, test helpers). Every background worker
+# plus one foreground caller gets a slot per raced provider, so races never queue behind each
+# other and burn their deadline before a request goes out
+IPFS_RACE_PROVIDERS = 3  # Pinata, NFT.Storage, Infura
+_upload_pool = ThreadPoolExecutor(max_workers=(IPFS_BACKGROUND_WORKERS + 1) * IPFS_RACE_PROVIDERS,
+                                  thread_name_prefix="ipfs-upload")
+IPFS_RACE_TIMEOUT = 30  # Overall deadline for a threaded race, retries included
+
+# Identical metadata already pinned this process; CIDs never go stale, so LRU not TTL
+IPFS_CID_CACHE_SIZE = 1024
+_cid_cache = LRUCache(maxsize=IPFS_CID_CACHE_SIZE)
+_cid_lock = threading.Lock()
+
+# Providers that keep failing are skipped for a cooldown instead of costing a full timeout each
+IPFS_BREAKER_THRESHOLD = 5  # Consecutive failures before a provider's breaker opens
+IPFS_BREAKER_COOLDOWN = 60.0  # Seconds an open breaker rejects calls before letting one probe through
+
+def _serialize(obj: dict) -> bytes:
+    """Compact metadata file body; serialized once per upload and shared by every provider/fallback"""
+    return orjson.dumps(obj, option=_JSON_OPTS)
+
+def _content_key(json_bytes: bytes) -> bytes:
+    """128-bit BLAKE2b digest of the serialized metadata"""
+    return hashlib.blake2b(json_bytes, digest_size=16).digest()
+
+def _cached_cid(key: bytes) -> str:
+    """ipfs:// URL previously pinned for this content, or an empty string"""
+    with _cid_lock:
+        return _cid_cache.get(key, "")
+
+def _remember_cid(key: bytes, ipfs_url: str) -> str:
+    """Record a successful upload and pass its URL through"""
+    if ipfs_url:
+        with _cid_lock:
+            _cid_cache[key] = ipfs_url
+    return ipfs_url
+
+class _Breaker:
+    """Consecutive-failure circuit breaker for one provider (closed -> open -> half-open probe)"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.failures = 0
+        self.opened_at = None  # Monotonic time the breaker last opened; None while closed
+        self.probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may go out; after the cooldown exactly one probe is admitted"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < IPFS_BREAKER_COOLDOWN:
+                return False
+            self.probing = True
+            return True
+    
+    def record(self, ok):
+        """Record a call's outcome; None means it was abandoned (e.g. lost a race) and counts as neither"""
+        with self._lock:
+            self.probing = False
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= IPFS_BREAKER_THRESHOLD:
+                if self.opened_at is None:
+                    logger.warning("🔌 %s breaker open after %d failures; skipping for %.0fs",
+                                   self.name, self.failures, IPFS_BREAKER_COOLDOWN)
+                self.opened_at = time.monotonic()
+
+_BREAKERS = {name: _Breaker(name) for name in ('Pinata', 'NFT.Storage', 'Infura', 'Web3.Storage')}
+
+def _guarded(name: str, credential: Optional[str]):
+    """Short-circuit a sync upload helper to an empty string while its provider's breaker is open"""
+    breaker = _BREAKERS[name]
+    def decorator(upload):
+        @wraps(upload)
+        def wrapper(obj: dict, *args, **kwargs) -> str:
+            # An unconfigured provider is skipped, not failed, so it never trips its breaker
+            if not credential or not breaker.allow():
+                return ""
+            ipfs_url = ""
+            try:
+                ipfs_url = upload(obj, *args, **kwargs)
+                return ipfs_url
+            finally:
+                breaker.record(bool(ipfs_url))
+        return wrapper
+    return decorator
+
+@lru_cache(maxsize=1)
+def _infura_auth() -> str:
+    """Basic auth header for Infura; the credentials are fixed at import, so encode once"""
+    auth_bytes = f"{INFURA_PROJECT_ID}:{INFURA_PROJECT_SECRET or ''}".encode('ascii')
+    return f"Basic {base64.b64encode(auth_bytes).decode('ascii')}"
+
+def _pin_name(obj: dict) -> str:
+    """Pin name shown in the Pinata dashboard"""
+    return f"TruthLens-Attestation-{obj.get('marketId', 'unknown')}"
+
+def _pinata_payload(obj: dict) -> dict:
+    """pinJSONToIPFS body: the metadata plus its pin name and CIDv1 option"""
+    return {
+        "pinataContent": obj,
+        "pinataMetadata": {"name": _pin_name(obj)},
+        "pinataOptions": _PINATA_OPTIONS
+    }
+
+def _pinata_file_form(obj: dict) -> dict:
+    """pinFileToIPFS form fields; only the pin name is serialized per upload"""
+    return {
+        'pinataMetadata': orjson.dumps({'name': _pin_name(obj), 'keyvalues': _PINATA_KEYVALUES}),
+        'pinataOptions': _PINATA_OPTIONS_JSON
+    }
+
+@_guarded('Pinata', PINATA_JWT)
 def put_json(obj: dict) -> str:
     """Upload JSON object to Pinata IPFS"""
-    jwt_token = os.getenv('PINATA_JWT')
+    jwt_token = PINATA_JWT
     
     if not jwt_token:
-        print("❌ PINATA_JWT not configured - skipping IPFS upload")
+        logger.warning("❌ PINATA_JWT not configured - skipping IPFS upload")
         return ""
     
+    json_bytes = _serialize(obj)
+    key = _content_key(json_bytes)
+    cached = _cached_cid(key)
+    if cached:
+        return cached
+    
     try:
         headers = {
             'Authorization': f'Bearer {jwt_token}',
             'Content-Type': 'application/json'
         }
         
-        payload = {
-            "pinataContent": obj,
-            "pinataMetadata": {
-                "name": f"TruthLens-Attestation-{obj.get('marketId', 'unknown')}"
-            },
-            "pinataOptions": {
-                "cidVersion": 1
-            }
-        }
-        
-        print("📤 Uploading metadata to Pinata IPFS...")
-        response = requests.post(
+        logger.debug("📤 Uploading metadata to Pinata IPFS...")
+        response = _SESSION.post(
             'https://api.pinata.cloud/pinning/pinJSONToIPFS',
             headers=headers,
-            json=payload,
-            timeout=30
+            data=orjson.dumps(_pinata_payload(obj), option=_JSON_OPTS),
+            timeout=_HTTP_TIMEOUT
         )
         
-        print(f"   Response status: {response.status_code}")
+        logger.debug("   Response status: %s", response.status_code)
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             cid = result.get('IpfsHash')
             ipfs_url = f"ipfs://{cid}"
-            print(f"✅ Uploaded to Pinata IPFS: {ipfs_url}")
-            print(f"   View at: https://gateway.pinata.cloud/ipfs/{cid}")
-            return ipfs_url
+            logger.info("✅ Uploaded to Pinata IPFS: %s", ipfs_url)
+            logger.debug("   View at: https://gateway.pinata.cloud/ipfs/%s", cid)
+            return _remember_cid(key, ipfs_url)
         else:
-            print(f"❌ Pinata upload failed: {response.status_code}")
-            print(f"   Response: {response.text}")
+            logger.warning("❌ Pinata upload failed: %s", response.status_code)
+            logger.debug("   Response: %s", response.text)
             
             # Try alternative approach for 403 errors
             if response.status_code == 403:
-                print("   Trying alternative Pinata endpoint...")
-                return upload_via_pinata_file_api(obj, jwt_token)
+                logger.info("   Trying alternative Pinata endpoint...")
+                return _remember_cid(key, upload_via_pinata_file_api(obj, jwt_token, json_bytes))
             
             return ""
             
     except Exception as e:
-        print(f"❌ Pinata upload error: {e}")
-        return ""
-    
-    try:
-        # Prepare the JSON data as a file
-        json_data = json.dumps(obj, indent=2)
-        json_bytes = json_data.encode('utf-8')
-        
-        # Create file-like object
-        files = {
-            'file': ('metadata.json', BytesIO(json_bytes), 'application/json')
-        }
-        
-        headers = {
-            'Authorization': f'Bearer {token}'
-        }
-        
-        print("📤 Uploading metadata to IPFS via Web3.Storage...")
-        # Try the new Storacha API endpoint first
-        try:
-            response = requests.post(
-                'https://up.web3.storage/upload',
-                headers=headers,
-                files=files,
-                timeout=30
-            )
-        except requests.exceptions.RequestException:
-            # Fallback to legacy endpoint
-            response = requests.post(
-                'https://api.web3.storage/upload',
-                headers=headers,
-                files=files,
-                timeout=30
-            )
-        
-        response.raise_for_status()
-        result = response.json()
-        cid = result.get('cid', '')
-        
-        if cid:
-            ipfs_url = f"ipfs://{cid}"
-            print(f"✅ Uploaded to IPFS: {ipfs_url}")
-            print(f"   View at: https://{cid}.ipfs.w3s.link/metadata.json")
-            return ipfs_url
-        else:
-            print("❌ No CID returned from Web3.Storage")
-            return ""
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ IPFS upload failed: {e}")
+        logger.warning("❌ Pinata upload error: %s", e)
         return ""
 
 def test_pinata():
     """Test Pinata IPFS API connection"""
-    jwt_token = os.getenv('PINATA_JWT')
+    jwt_token = PINATA_JWT
     
     if not jwt_token:
         print("❌ Pinata JWT token not configured")
@@ -119,14 +260,14 @@ def test_pinata():
     try:
         # First test authentication
         headers = {'Authorization': f'Bearer {jwt_token}'}
-        response = requests.get(
+        response = _SESSION.get(
             'https://api.pinata.cloud/data/testAuthentication',
             headers=headers,
-            timeout=10
+            timeout=_HTTP_TIMEOUT
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             message = result.get('message', 'Unknown')
             print(f"✅ Pinata authentication: {message}")
             
@@ -152,74 +293,65 @@ def test_pinata():
         print(f"❌ Pinata test error: {e}")
         return False
 
-def upload_via_pinata_file_api(obj: dict, jwt_token: str) -> str:
+def upload_via_pinata_file_api(obj: dict, jwt_token: str, json_bytes: bytes = None) -> str:
     """Alternative Pinata upload using file API"""
     try:
-        # Convert JSON to file-like object
-        json_data = json.dumps(obj, indent=2)
-        json_bytes = json_data.encode('utf-8')
+        json_bytes = json_bytes or _serialize(obj)
         
         files = {
-            'file': ('metadata.json', BytesIO(json_bytes), 'application/json')
+            'file': ('metadata.json', json_bytes, 'application/json')
         }
         
-        # Metadata for the file
-        pinata_metadata = json.dumps({
-            'name': f'TruthLens-Attestation-{obj.get("marketId", "unknown")}',
-            'keyvalues': {
-                'service': 'TruthLens',
-                'type': 'attestation-metadata'
-            }
-        })
-        
-        data = {
-            'pinataMetadata': pinata_metadata,
-            'pinataOptions': json.dumps({'cidVersion': 1})
-        }
+        # Metadata and options for the file
+        data = _pinata_file_form(obj)
         
         headers = {
             'Authorization': f'Bearer {jwt_token}'
         }
         
-        print("   📤 Trying Pinata file upload API...")
-        response = requests.post(
+        logger.debug("   📤 Trying Pinata file upload API...")
+        response = _SESSION.post(
             'https://api.pinata.cloud/pinning/pinFileToIPFS',
             files=files,
             data=data,
             headers=headers,
-            timeout=30
+            timeout=_HTTP_TIMEOUT
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             cid = result.get('IpfsHash')
             if cid:
                 ipfs_url = f"ipfs://{cid}"
-                print(f"✅ Alternative upload successful: {ipfs_url}")
+                logger.info("✅ Alternative upload successful: %s", ipfs_url)
                 return ipfs_url
         else:
-            print(f"   ❌ Alternative upload also failed: {response.status_code}")
-            print(f"   Response: {response.text}")
+            logger.warning("   ❌ Alternative upload also failed: %s", response.status_code)
+            logger.debug("   Response: %s", response.text)
             
     except Exception as e:
-        print(f"   ❌ Alternative upload error: {e}")
+        logger.warning("   ❌ Alternative upload error: %s", e)
     
     return ""
 
+_WEB3_SETUP_GUIDE = (
+    "\n🌐 Web3.Storage Setup Guide:\n"
+    "1. Go to https://web3.storage/\n"
+    "2. Sign up with email or GitHub\n"
+    "3. Go to 'Account' → 'Create a token'\n"
+    "4. Copy the token and add to your .env file:\n"
+    "   WEB3STORAGE_TOKEN=your_token_here\n"
+    "5. Free tier includes 5GB storage + unlimited bandwidth\n"
+    "\n"
+)
+
 def setup_web3_storage():
     """Helper function to guide users through Web3.Storage setup"""
-    print("\n🌐 Web3.Storage Setup Guide:")
-    print("1. Go to https://web3.storage/")
-    print("2. Sign up with email or GitHub")
-    print("3. Go to 'Account' → 'Create a token'")
-    print("4. Copy the token and add to your .env file:")
-    print("   WEB3STORAGE_TOKEN=your_token_here")
-    print("5. Free tier includes 5GB storage + unlimited bandwidth")
-    print("")
+    sys.stdout.write(_WEB3_SETUP_GUIDE)
 
 def test_web3_storage():
     """Test Web3.Storage connection"""
-    token = os.getenv('WEB3STORAGE_TOKEN')
+    token = WEB3STORAGE_TOKEN
     if not token:
         print("❌ No Web3.Storage token configured")
         setup_web3_storage()
@@ -245,33 +377,33 @@ def test_web3_storage():
 
 # Pinata implementation is now in put_json() function above
 
+@_guarded('NFT.Storage', NFT_STORAGE_TOKEN)
 def upload_to_nft_storage(obj: dict) -> str:
     """Upload to NFT.Storage"""
-    token = os.getenv('NFT_STORAGE_TOKEN')
+    token = NFT_STORAGE_TOKEN
     if not token:
         return ""
     
     try:
-        json_data = json.dumps(obj, indent=2)
-        json_bytes = json_data.encode('utf-8')
+        json_bytes = _serialize(obj)
         
         files = {
-            'file': ('metadata.json', BytesIO(json_bytes), 'application/json')
+            'file': ('metadata.json', json_bytes, 'application/json')
         }
         
         headers = {
             'Authorization': f'Bearer {token}'
         }
         
-        response = requests.post(
+        response = _SESSION.post(
             'https://api.nft.storage/upload',
             headers=headers,
             files=files,
-            timeout=30
+            timeout=_HTTP_TIMEOUT
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             cid = result.get('value', {}).get('cid')
             if cid:
                 return f"ipfs://{cid}"
@@ -280,40 +412,32 @@ def upload_to_nft_storage(obj: dict) -> str:
         pass
     return ""
 
+@_guarded('Infura', INFURA_PROJECT_ID)
 def upload_to_infura(obj: dict) -> str:
     """Upload to Infura IPFS"""
-    project_id = os.getenv('INFURA_PROJECT_ID')
-    project_secret = os.getenv('INFURA_PROJECT_SECRET')
-    if not project_id:
+    if not INFURA_PROJECT_ID:
         return ""
     
     try:
-        import base64
-        
-        auth_string = f"{project_id}:{project_secret or ''}"
-        auth_bytes = auth_string.encode('ascii')
-        auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-        
-        json_data = json.dumps(obj, indent=2)
-        json_bytes = json_data.encode('utf-8')
+        json_bytes = _serialize(obj)
         
         files = {
-            'file': ('metadata.json', BytesIO(json_bytes), 'application/json')
+            'file': ('metadata.json', json_bytes, 'application/json')
         }
         
         headers = {
-            'Authorization': f'Basic {auth_b64}'
+            'Authorization': _infura_auth()
         }
         
-        response = requests.post(
+        response = _SESSION.post(
             'https://ipfs.infura.io:5001/api/v0/add',
             headers=headers,
             files=files,
-            timeout=30
+            timeout=_HTTP_TIMEOUT
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             cid = result.get('Hash')
             if cid:
                 return f"ipfs://{cid}"
@@ -322,9 +446,25 @@ def upload_to_infura(obj: dict) -> str:
         pass
     return ""
 
+def _web3storage_post(endpoint: str, files: dict, headers: dict) -> str:
+    """POST to one Web3.Storage endpoint; the CID, or an empty string on any failure"""
+    try:
+        response = _SESSION.post(
+            endpoint,
+            headers=headers,
+            files=files,
+            timeout=_HTTP_TIMEOUT
+        )
+        if response.status_code == 200:
+            return orjson.loads(response.content).get('cid', '')
+    except Exception:
+        pass
+    return ""
+
+@_guarded('Web3.Storage', WEB3STORAGE_TOKEN)
 def upload_to_web3storage(obj: dict) -> str:
     """Upload to Web3.Storage/Storacha (legacy support)"""
-    token = os.getenv('WEB3STORAGE_TOKEN')
+    token = WEB3STORAGE_TOKEN
     if not token:
         return ""
     
@@ -333,34 +473,306 @@ def upload_to_web3storage(obj: dict) -> str:
         'https://up.storacha.network/upload'
     ]
     
-    for endpoint in endpoints:
+    # Built once; a bytes part (unlike a stream) can be sent to both endpoints
+    files = {
+        'file': ('metadata.json', _serialize(obj), 'application/json')
+    }
+    headers = {
+        'Authorization': f'Bearer {token}'
+    }
+    
+    # Race both endpoints on the upload pool (never called from inside it, so it cannot self-deadlock)
+    futures = [_upload_pool.submit(_web3storage_post, endpoint, files, headers) for endpoint in endpoints]
+    try:
+        for future in as_completed(futures, timeout=IPFS_RACE_TIMEOUT):
+            cid = future.result()
+            if cid:
+                return f"ipfs://{cid}"
+    except FuturesTimeoutError:  # Not the builtin TimeoutError before Python 3.11
+        pass
+    finally:
+        for future in futures:
+            future.cancel()
+    
+    return ""
+
+def put_json_racing(obj: dict) -> str:
+    """Upload JSON to every configured IPFS provider on worker threads; the first CID wins"""
+    key = _content_key(_serialize(obj))
+    cached = _cached_cid(key)
+    if cached:
+        return cached
+    
+    uploads = [upload for upload, configured in (
+        (put_json, PINATA_JWT),
+        (upload_to_nft_storage, NFT_STORAGE_TOKEN),
+        (upload_to_infura, INFURA_PROJECT_ID),
+    ) if configured]
+    if not uploads:
+        logger.warning("❌ No IPFS provider configured - skipping IPFS upload")
+        return ""
+    
+    pending = {_upload_pool.submit(upload, obj) for upload in uploads}
+    deadline = time.monotonic() + IPFS_RACE_TIMEOUT
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                ipfs_url = future.result()
+                if ipfs_url:
+                    logger.info("✅ Uploaded to IPFS: %s", ipfs_url)
+                    return _remember_cid(key, ipfs_url)
+    finally:
+        # Drops uploads still queued; ones already on the wire finish in the background
+        for future in pending:
+            future.cancel()
+    return ""
+
+def _background_worker():
+    """Drain the background queue: race the providers for each object and report its URL"""
+    while True:
+        obj, callback = _background_queue.get()
         try:
-            json_data = json.dumps(obj, indent=2)
-            json_bytes = json_data.encode('utf-8')
-            
-            files = {
-                'file': ('metadata.json', BytesIO(json_bytes), 'application/json')
-            }
-            
-            headers = {
-                'Authorization': f'Bearer {token}'
+            ipfs_url = put_json_racing(obj)
+            if callback is not None:
+                callback(ipfs_url)
+        except Exception as e:
+            logger.warning("❌ Background IPFS upload error: %s", e)
+
+def put_json_background(obj: dict, callback: Optional[Callable[[str], None]] = None):
+    """Queue an upload for the background workers and return at once; callback gets the ipfs:// URL or an empty string"""
+    dropped = []
+    with _background_lock:
+        if not _background_workers:
+            for n in range(IPFS_BACKGROUND_WORKERS):
+                worker = threading.Thread(target=_background_worker, name=f"ipfs-background-{n}", daemon=True)
+                worker.start()
+                _background_workers.append(worker)
+        while True:
+            try:
+                _background_queue.put_nowait((obj, callback))
+                break
+            except queue.Full:
+                try:
+                    dropped.append(_background_queue.get_nowait())
+                except queue.Empty:
+                    pass
+    # Tell callers whose uploads were shed, outside the lock
+    for old_obj, old_callback in dropped:
+        logger.warning("⚠️ IPFS background queue full; dropped upload for %s", old_obj.get('marketId', 'unknown'))
+        if old_callback is not None:
+            old_callback("")
+
+# Async provider race
+
+async def _post_file_async(url: str, json_bytes: bytes, headers: dict = None, data: dict = None) -> dict:
+    """POST the serialized metadata as a multipart file on the shared async client and decode the reply"""
+    response = await get_client().post(
+        url,
+        headers=headers,
+        files={'file': ('metadata.json', json_bytes, 'application/json')},
+        data=data,
+        timeout=_ASYNC_TIMEOUT
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def _pinata_async(obj: dict, json_bytes: bytes, jwt_token: str) -> str:
+    """Pin via pinJSONToIPFS, falling back to the file API on 403"""
+    headers = {'Authorization': f'Bearer {jwt_token}'}
+    response = await get_client().post(
+        'https://api.pinata.cloud/pinning/pinJSONToIPFS',
+        headers={**headers, 'Content-Type': 'application/json'},
+        content=orjson.dumps(_pinata_payload(obj), option=_JSON_OPTS),
+        timeout=_ASYNC_TIMEOUT
+    )
+    if response.status_code == 403:
+        result = await _post_file_async('https://api.pinata.cloud/pinning/pinFileToIPFS', json_bytes, headers,
+                                        _pinata_file_form(obj))
+    else:
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+    cid = result.get('IpfsHash')
+    return f"ipfs://{cid}" if cid else ""
+
+async def _nft_storage_async(json_bytes: bytes, token: str) -> str:
+    """Upload to NFT.Storage"""
+    result = await _post_file_async('https://api.nft.storage/upload', json_bytes, {'Authorization': f'Bearer {token}'})
+    cid = result.get('value', {}).get('cid')
+    return f"ipfs://{cid}" if cid else ""
+
+async def _infura_async(json_bytes: bytes) -> str:
+    """Upload to Infura IPFS"""
+    result = await _post_file_async('https://ipfs.infura.io:5001/api/v0/add', json_bytes, {'Authorization': _infura_auth()})
+    cid = result.get('Hash')
+    return f"ipfs://{cid}" if cid else ""
+
+async def _upload_slot(name: str, upload) -> str:
+    """Run one provider upload under the shared concurrency cap; failures resolve to an empty string"""
+    ok = None
+    try:
+        async with _upload_slots:
+            try:
+                ipfs_url = await upload
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("❌ %s upload error: %s", name, e)
+                ipfs_url = ""
+        ok = bool(ipfs_url)
+        return ipfs_url
+    finally:
+        if ok is None:
+            # Cancelled, possibly before the upload started
+            upload.close()
+        _BREAKERS[name].record(ok)
+
+def _async_uploads(obj: dict, json_bytes: bytes) -> list:
+    """(name, coroutine) for every configured provider whose breaker admits a call"""
+    providers = []
+    if PINATA_JWT:
+        providers.append(('Pinata', lambda: _pinata_async(obj, json_bytes, PINATA_JWT)))
+    if NFT_STORAGE_TOKEN:
+        providers.append(('NFT.Storage', lambda: _nft_storage_async(json_bytes, NFT_STORAGE_TOKEN)))
+    if INFURA_PROJECT_ID:
+        providers.append(('Infura', lambda: _infura_async(json_bytes)))
+    return [(name, start()) for name, start in providers if _BREAKERS[name].allow()]
+
+async def put_json_async(obj: dict) -> str:
+    """Upload JSON to every configured IPFS provider concurrently; the first CID wins and the rest are cancelled"""
+    json_bytes = _serialize(obj)
+    key = _content_key(json_bytes)
+    cached = _cached_cid(key)
+    if cached:
+        return cached
+    
+    uploads = _async_uploads(obj, json_bytes)
+    if not uploads:
+        logger.warning("❌ No IPFS provider configured or available - skipping IPFS upload")
+        return ""
+    
+    pending = {asyncio.create_task(_upload_slot(name, upload)) for name, upload in uploads}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ipfs_url = task.result()
+                if ipfs_url:
+                    logger.info("✅ Uploaded to IPFS: %s", ipfs_url)
+                    return _remember_cid(key, ipfs_url)
+    finally:
+        for task in pending:
+            task.cancel()
+    return ""
+
+# Batched pinning
+
+async def put_json_batch_async(objs: List[dict]) -> List[str]:
+    """Pin several metadata objects as one Pinata directory; falls back to per-object races"""
+    blobs = [_serialize(obj) for obj in objs]
+    keys = [_content_key(blob) for blob in blobs]
+    urls = [_cached_cid(key) for key in keys]
+    misses = [i for i, url in enumerate(urls) if not url]
+    
+    breaker = _BREAKERS['Pinata']
+    if len(misses) > 1 and PINATA_JWT and breaker.allow():
+        ok = None
+        try:
+            files = [('file', (f"{_PIN_BATCH_DIR}/{n}.json", blobs[i], 'application/json')) for n, i in enumerate(misses)]
+            data = {
+                'pinataMetadata': orjson.dumps({'name': 'TruthLens-Attestation-Batch', 'keyvalues': _PINATA_KEYVALUES}),
+                'pinataOptions': _PINATA_OPTIONS_JSON
             }
-            
-            response = requests.post(
-                endpoint,
-                headers=headers,
+            response = await get_client().post(
+                'https://api.pinata.cloud/pinning/pinFileToIPFS',
+                headers={'Authorization': f'Bearer {PINATA_JWT}'},
                 files=files,
-                timeout=30
+                data=data,
+                timeout=_ASYNC_TIMEOUT
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                cid = result.get('cid', '')
-                
-                if cid:
-                    return f"ipfs://{cid}"
-                    
-        except Exception:
-            continue
+            response.raise_for_status()
+            cid = orjson.loads(response.content).get('IpfsHash')
+            ok = bool(cid)
+            if cid:
+                for n, i in enumerate(misses):
+                    urls[i] = _remember_cid(keys[i], f"ipfs://{cid}/{n}.json")
+                logger.info("✅ Pinned %d metadata files under ipfs://%s", len(misses), cid)
+                return urls
+        except (httpx.HTTPError, ValueError) as e:
+            ok = False
+            logger.warning("❌ Pinata batch upload error: %s", e)
+        finally:
+            breaker.record(ok)
     
-    return ""
\ No newline at end of file
+    # A lone miss, or the batch failed: race the providers for each object
+    for i, url in zip(misses, await asyncio.gather(*(put_json_async(objs[i]) for i in misses))):
+        urls[i] = url
+    return urls
+
+async def _run_pin_batch(batch: List[tuple]):
+    """Pin one batch and resolve each caller's future"""
+    try:
+        urls = await put_json_batch_async([obj for obj, _ in batch])
+        for (_, future), url in zip(batch, urls):
+            if not future.done():
+                future.set_result(url)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+    finally:
+        # Cancelled at shutdown: don't leave callers awaiting futures nobody will resolve
+        for _, future in batch:
+            if not future.done():
+                future.cancel()
+
+async def _pin_batch_worker():
+    """Collect queued metadata into batches of up to IPFS_BATCH_SIZE within IPFS_BATCH_WINDOW"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _pin_queue.get()]
+        deadline = loop.time() + IPFS_BATCH_WINDOW
+        try:
+            while len(batch) < IPFS_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_pin_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Stopped while collecting: release the callers already taken off the queue
+            for _, future in batch:
+                future.cancel()
+            raise
+        # Upload in the background so the next batch can start collecting
+        task = asyncio.create_task(_run_pin_batch(batch))
+        _pin_batches.add(task)
+        task.add_done_callback(_pin_batches.discard)
+
+async def put_json_batched(obj: dict) -> str:
+    """Queue metadata for the next batched pin and wait for its ipfs:// URL"""
+    global _pin_batcher
+    if _pin_batcher is None or _pin_batcher.done():
+        _pin_batcher = asyncio.create_task(_pin_batch_worker())
+    future = asyncio.get_running_loop().create_future()
+    await _pin_queue.put((obj, future))
+    return await future
+
+async def stop_pin_batcher():
+    """Cancel the pin batcher and its in-flight batches, and any uploads still queued (app shutdown)"""
+    global _pin_batcher
+    tasks = list(_pin_batches)
+    if _pin_batcher is not None:
+        tasks.append(_pin_batcher)
+        _pin_batcher = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    while not _pin_queue.empty():
+        _, future = _pin_queue.get_nowait()
+        future.cancel()
@@ -0,0 +1,26 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket: let through at most `max_per_sec` records per second, drop the rest"""
+
+    def __init__(self, max_per_sec: float = 10.0, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = max_per_sec
+        self.capacity = burst or max_per_sec
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
@@ -0,0 +1,11 @@
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlparse
+
+@lru_cache(maxsize=4096)
+def url_host(url: str) -> Optional[str]:
+    """Lowercased netloc of a URL, memoized since the same sources recur across comments; None if unparsable"""
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return None